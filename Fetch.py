@@ -1,5 +1,6 @@
 import json
 import os
+from freshness import load_json, derive
 
 def extract_stat_with_american_odds(input_file, output_file):
     """
@@ -13,9 +14,11 @@ def extract_stat_with_american_odds(input_file, output_file):
     The American odds string is cleaned so that any Unicode minus sign (‐)
     is replaced with a normal hyphen ("-").
     """
-    # Load the JSON data
-    with open(input_file, 'r') as f:
-        data = json.load(f)
+    # Load the JSON data; without a usable copy, last run's lines are left as they are
+    data = load_json(input_file)
+    if data is None:
+        print(f"Skipping '{input_file}': no usable DraftKings data")
+        return
     
     # Build a mapping from event id to its details (matchup and game time)
     event_mapping = {}
@@ -98,6 +101,7 @@ def extract_stat_with_american_odds(input_file, output_file):
     # Write the output file inside the 'lines' folder.
     with open(f'lines/{output_file}', 'w') as f:
         json.dump(output_list, f, indent=2, ensure_ascii=False)
+    derive(f'lines/{output_file}', input_file)
     
     print(f"Extracted data for {len(output_list)} players from '{input_file}' to 'lines/{output_file}'.")
 
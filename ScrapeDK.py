@@ -2,6 +2,7 @@ import os
 import json
 import requests
 import time
+from freshness import mark_fresh, mark_failed
 
 # Define URLs for all the NBA stat types
 urls = {
@@ -31,6 +32,9 @@ headers = {
     'Sec-Fetch-Site': 'same-origin',
 }
 
+# One keep-alive session, so repeated fetches (and daemon refreshes) reuse connections
+session = requests.Session()
+
 # Ensure the 'data' folder exists
 os.makedirs('data', exist_ok=True)
 
@@ -39,9 +43,10 @@ def fetch_and_save_json(url, filename):
     Ultra-lightweight function to fetch JSON from DraftKings API using requests.
     This approach uses ~99% less CPU and memory compared to Selenium!
     """
+    path = f"data/{filename}"
     try:
         start_time = time.time()
-        response = requests.get(url, headers=headers, timeout=15)
+        response = session.get(url, headers=headers, timeout=15)
         end_time = time.time()
         
         if response.status_code == 200:
@@ -49,26 +54,32 @@ def fetch_and_save_json(url, filename):
             parsed_data = response.json()
             
             # Save JSON file inside the 'data' folder
-            with open(f"data/{filename}", "w", encoding="utf-8") as file:
+            with open(path, "w", encoding="utf-8") as file:
                 json.dump(parsed_data, file, ensure_ascii=False, indent=4)
+            mark_fresh(path)
             
             print(f"✅ {filename}: {len(response.text)} bytes in {end_time - start_time:.2f}s")
             return True
         else:
             print(f"❌ {filename}: HTTP {response.status_code} - {response.text[:100]}")
+            mark_failed(path, f"HTTP {response.status_code}")
             return False
             
     except requests.exceptions.Timeout:
         print(f"❌ {filename}: Request timed out")
+        mark_failed(path, "request timed out")
         return False
     except requests.exceptions.RequestException as e:
         print(f"❌ {filename}: Request failed - {e}")
+        mark_failed(path, e)
         return False
     except json.JSONDecodeError as e:
         print(f"❌ {filename}: Invalid JSON response - {e}")
+        mark_failed(path, e)
         return False
     except Exception as e:
         print(f"❌ {filename}: Unexpected error - {e}")
+        mark_failed(path, e)
         return False
 
 def main():
@@ -3,13 +3,29 @@ import json
 import time
 import re
 import asyncio
+import sys
+from urllib.parse import urlparse, parse_qs
 from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 from concurrent.futures import ThreadPoolExecutor
+from browser_service import connect_or_launch, warm_context_options
+from resource_allowlist import load_version, is_allowed, invalidate_allowlist, learn_allowlist, learned_types, relearn_lock, start_relearn
+from snapshot_store import snapshot_reason, save_snapshot
+from memory_governor import governor, max_workers, wait_for_headroom
+from freshness import mark_fresh, mark_failed
 
 # Regex to match "Pick <Name> for Less than"
 player_regex = re.compile(r"^Pick\s+(.*?)\s+for\s+Less than", re.IGNORECASE)
 
+# Locked players for this sport, written once at the end of the run
+locked_file = "locked.json"
+
+# Compressed debug snapshots, kept only on failures, anomalies and samples
+snapshot_dir = "data_p6/snapshots"
+
+# Option counts from the previous run, for spotting sudden drops
+previous_counts = {}
+
 # NBA stat categories and URLs
 urls = {
     "points": ("Points", "https://pick6.draftkings.com/?sport=NBA&stat=PTS"),
@@ -26,20 +42,290 @@ urls = {
     "sb": ("Steals + Blocks", "https://pick6.draftkings.com/?stat=STL%2BBLK")
 }
 
+# WebKit launch flags tuned for the Pi
+browser_args = [
+    # Memory optimizations
+    '--memory-pressure-off',
+    '--max_old_space_size=256',  # Even smaller heap for Pi
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+
+    # CPU optimizations  
+    '--single-process',
+    '--disable-background-timer-throttling',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows',
+
+    # Network/Security optimizations
+    '--disable-features=TranslateUI,BlinkGenPropertyTrees',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+]
+
+# Load one page per sport and switch stats in-app (P6_SINGLE_PAGE=1)
+single_page_mode = os.getenv("P6_SINGLE_PAGE") == "1"
+
+# Learned script/XHR allowlist (P6_ALLOWLIST=0 disables it, P6_LEARN_ALLOWLIST=1 relearns it)
+allowlist = None
+allowlist_seen = set()
+allowlist_failed = False
+
+def reset_allowlist():
+    """
+    Reloads the learned allowlist from disk at the start of a run, so a failure in an
+    earlier run doesn't keep it off for the rest of a resident process's life.
+    """
+    global allowlist, allowlist_seen, allowlist_failed
+    version = load_version() if os.getenv("P6_ALLOWLIST") != "0" else None
+    allowlist = set(version["required"]) if version else None
+    allowlist_seen = set(version["seen"]) if version else set()
+    allowlist_failed = False
+
+reset_allowlist()
+
 def normalize_to_initial_format(full_name):
     parts = full_name.strip().split()
     if len(parts) >= 2:
         return f"{parts[0][0]}. {' '.join(parts[1:])}"
     return full_name
 
+def options_path(stat_name):
+    return f"options/{stat_name}_options.json"
+
 def clear_stats_files():
+    """
+    Records each stat's current option count for the anomaly snapshots. The options
+    files are left in place, so a stat that fails to refresh keeps its last good list.
+    """
     os.makedirs("options", exist_ok=True)
     os.makedirs("data_p6", exist_ok=True)
-    with open("locked.json", "w", encoding="utf-8") as f:
-        json.dump([], f)
     for stat_name in urls:
-        with open(f"options/{stat_name}_options.json", "w", encoding="utf-8") as f:
-            json.dump([], f)
+        try:
+            with open(options_path(stat_name), "r", encoding="utf-8") as f:
+                previous_counts[stat_name] = len(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            previous_counts[stat_name] = 0
+
+def save_options(stat_name, players):
+    """Replaces a stat's options in one atomic rename and marks them fresh."""
+    path = options_path(stat_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(players, f, indent=4)
+    os.replace(tmp_path, path)
+    mark_fresh(path)
+
+def save_locked_players(locked_players):
+    """
+    Writes the locked players collected across all stats in a single atomic replace,
+    so readers never see a partially written file.
+    """
+    tmp_file = f"{locked_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(sorted(locked_players), f, indent=4)
+    os.replace(tmp_file, locked_file)
+
+# Ultra-aggressive resource blocking
+async def block_unnecessary_resources(route):
+    resource_type = route.request.resource_type
+    url_path = route.request.url
+
+    # Block almost everything except essential content
+    if resource_type in {
+        "image", "stylesheet", "font", "media", "websocket", 
+        "manifest", "other", "eventsource", "texttrack"
+    }:
+        await route.abort()
+    elif allowlist is not None and resource_type in learned_types:
+        # Only load the scripts and XHRs the learned allowlist says the cards need
+        if is_allowed(allowlist, url_path):
+            await route.continue_()
+        elif not is_allowed(allowlist_seen, url_path):
+            # The learned site version never made this request, so Pick6 has deployed since
+            drop_allowlist("Pick6", "Site version changed since the allowlist was learned")
+            await route.continue_()
+        else:
+            await route.abort()
+    elif resource_type == "script":
+        # Block analytics and tracking scripts
+        if any(blocked in url_path.lower() for blocked in [
+            'google-analytics', 'googletagmanager', 'facebook', 'twitter',
+            'doubleclick', 'adsystem', 'amazon-adsystem', 'googlesyndication',
+            'hotjar', 'mixpanel', 'segment', 'amplitude'
+        ]):
+            await route.abort()
+        else:
+            await route.continue_()
+    else:
+        await route.continue_()
+
+def drop_allowlist(stat_label, reason="Extraction failed with the learned allowlist"):
+    """
+    Falls back to default blocking for the rest of the run when extraction fails
+    under the learned allowlist or the site changed under it, and flags it for relearning.
+    Returns True if the allowlist was in use.
+    """
+    global allowlist, allowlist_failed
+    if allowlist is None:
+        return False
+    print(f"⚠️ {stat_label}: {reason}, falling back to default blocking")
+    allowlist = None
+    allowlist_failed = True
+    invalidate_allowlist()
+    return True
+
+async def relearn_allowlist():
+    """Learns a fresh allowlist from the first stat that loads, unless another process already is."""
+    with relearn_lock() as held:
+        if not held:
+            print("🧪 Allowlist relearn already running elsewhere")
+            return
+        async with async_playwright() as p:
+            for stat_label, url in urls.values():
+                if await learn_allowlist(p, browser_args, url, stat_label) is not None:
+                    return
+
+async def new_scrape_page(browser):
+    """
+    Opens a page with the minimal context, resource blocking and init script
+    used for every Pick6 load.
+    """
+    # Create minimal context
+    context = await browser.new_context(
+        viewport={'width': 800, 'height': 600},
+        java_script_enabled=True,
+        ignore_https_errors=True,
+        user_agent='Mozilla/5.0 (X11; Linux aarch64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        **warm_context_options()
+    )
+
+    page = await context.new_page()
+
+    # Apply resource blocking
+    await page.route("**/*", block_unnecessary_resources)
+
+    # Disable heavy features
+    await page.add_init_script("""
+        // Disable animations and transitions
+        const style = document.createElement('style');
+        style.textContent = `
+            *, *::before, *::after {
+                animation-duration: 0s !important;
+                animation-delay: 0s !important;
+                transition-duration: 0s !important;
+                transition-delay: 0s !important;
+            }
+        `;
+        document.head.appendChild(style);
+
+        // Disable console logging
+        console.log = console.warn = console.error = () => {};
+
+        // Disable performance monitoring
+        if (window.performance && window.performance.mark) {
+            window.performance.mark = () => {};
+            window.performance.measure = () => {};
+        }
+    """)
+
+    return page
+
+async def extract_stat(page, stat_name, stat_label, start_time):
+    """
+    Waits for the current stat's player cards, saves the options file and
+    returns the locked players (None if the stat didn't load).
+    """
+    # Check if stat type is available
+    try:
+        await page.wait_for_selector(f'text="{stat_label}"', timeout=5000)
+    except:
+        # Only a page that finished loading its player cards confirms the stat isn't offered;
+        # otherwise it's a slow or failed load and the last good options keep being served
+        if await page.query_selector('[data-testid="playerStatCard"]') is None:
+            print(f"⚠️ {stat_label} not found on page, keeping the last good options")
+            return None
+        print(f"⚠️ {stat_label} not offered on this slate. Skipping.")
+        save_options(stat_name, [])
+        return set()
+
+    # Wait for player cards to load
+    try:
+        await page.wait_for_selector('[data-testid="playerStatCard"]', timeout=15000)
+        # Give a moment for dynamic content
+        await page.wait_for_timeout(3000)
+    except:
+        print(f"⚠️ {stat_label}: Player cards didn't load in time")
+        drop_allowlist(stat_label)
+        try:
+            save_snapshot(snapshot_dir, stat_name, "failure", await page.content())
+        except Exception as e:
+            print(f"⚠️ {stat_label}: Couldn't capture failure snapshot - {e}")
+        return
+
+    # Get page content
+    html = await page.content()
+    end_time = time.time()
+
+    print(f"✅ {stat_label}: Page loaded in {end_time - start_time:.2f}s")
+
+    # Parse with BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Get locked players
+    locked_players_set = set()
+    for card in soup.select('[data-testid="playerStatCard"]'):
+        name_tag = card.select_one('[data-testid="player-name"]')
+        if not name_tag:
+            continue
+        name = name_tag.get_text(strip=True)
+        if card.find("use", {"href": "#lock-icon"}):
+            locked_players_set.add(name)
+
+    # Get "Less than" players using page.evaluate for more reliable extraction
+    valid_players_set = set()
+    try:
+        buttons_data = await page.evaluate("""
+            () => {
+                const buttons = Array.from(document.querySelectorAll('button[aria-label*="for Less than"]'));
+                return buttons.map(btn => btn.getAttribute('aria-label')).filter(label => label);
+            }
+        """)
+
+        for aria_label in buttons_data:
+            match = player_regex.search(aria_label)
+            if match:
+                name = match.group(1).strip()
+                if name != "Contest Fill":
+                    valid_players_set.add(name)
+    except Exception as e:
+        print(f"⚠️ {stat_label}: Error extracting player buttons - {e}")
+
+    # Exclude locked players
+    unlocked_valid_players = sorted([
+        name for name in valid_players_set
+        if normalize_to_initial_format(name) not in locked_players_set
+    ])
+
+    # Save results
+    save_options(stat_name, unlocked_valid_players)
+
+    # Keep the HTML only for failures, anomalies and the occasional sample
+    reason = snapshot_reason(not valid_players_set, len(unlocked_valid_players), previous_counts.get(stat_name, 0))
+    if reason:
+        save_snapshot(snapshot_dir, stat_name, reason, html, {
+            "label": stat_label,
+            "options": unlocked_valid_players,
+            "locked": sorted(locked_players_set),
+        })
+
+    print(f"✅ {stat_label}: {len(unlocked_valid_players)} options, {len(locked_players_set)} locked")
+    return locked_players_set
 
 async def scrape_with_ultra_lightweight_playwright(stat_name, stat_label, url):
     """
@@ -47,196 +333,118 @@ async def scrape_with_ultra_lightweight_playwright(stat_name, stat_label, url):
     Uses all the performance optimizations we discovered.
     """
     async with async_playwright() as p:
-        # Launch browser with maximum optimizations for Pi
-        browser = await p.webkit.launch(
-            headless=True,
-            args=[
-                # Memory optimizations
-                '--memory-pressure-off',
-                '--max_old_space_size=256',  # Even smaller heap for Pi
-                '--disable-dev-shm-usage',
-                '--disable-gpu',
-                '--disable-software-rasterizer',
-                
-                # CPU optimizations  
-                '--single-process',
-                '--disable-background-timer-throttling',
-                '--disable-renderer-backgrounding',
-                '--disable-backgrounding-occluded-windows',
-                
-                # Network/Security optimizations
-                '--disable-features=TranslateUI,BlinkGenPropertyTrees',
-                '--disable-extensions',
-                '--disable-plugins',
-                '--disable-default-apps',
-                '--disable-sync',
-                '--disable-web-security',
-                '--disable-features=VizDisplayCompositor',
-            ]
-        )
-        
-        # Ultra-aggressive resource blocking
-        async def block_unnecessary_resources(route):
-            resource_type = route.request.resource_type
-            url_path = route.request.url
-            
-            # Block almost everything except essential content
-            if resource_type in {
-                "image", "stylesheet", "font", "media", "websocket", 
-                "manifest", "other", "eventsource", "texttrack"
-            }:
-                await route.abort()
-            elif resource_type == "script":
-                # Block analytics and tracking scripts
-                if any(blocked in url_path.lower() for blocked in [
-                    'google-analytics', 'googletagmanager', 'facebook', 'twitter',
-                    'doubleclick', 'adsystem', 'amazon-adsystem', 'googlesyndication',
-                    'hotjar', 'mixpanel', 'segment', 'amplitude'
-                ]):
-                    await route.abort()
-                else:
-                    await route.continue_()
-            else:
-                await route.continue_()
+        # Reuse the warm browser service if it's running, otherwise launch with maximum optimizations for Pi
+        browser = await connect_or_launch(p, browser_args)
 
         try:
-            # Create minimal context
-            context = await browser.new_context(
-                viewport={'width': 800, 'height': 600},
-                java_script_enabled=True,
-                ignore_https_errors=True,
-                user_agent='Mozilla/5.0 (X11; Linux aarch64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            )
-            
-            page = await context.new_page()
-            
-            # Apply resource blocking
-            await page.route("**/*", block_unnecessary_resources)
-            
-            # Disable heavy features
-            await page.add_init_script("""
-                // Disable animations and transitions
-                const style = document.createElement('style');
-                style.textContent = `
-                    *, *::before, *::after {
-                        animation-duration: 0s !important;
-                        animation-delay: 0s !important;
-                        transition-duration: 0s !important;
-                        transition-delay: 0s !important;
-                    }
-                `;
-                document.head.appendChild(style);
-                
-                // Disable console logging
-                console.log = console.warn = console.error = () => {};
-                
-                // Disable performance monitoring
-                if (window.performance && window.performance.mark) {
-                    window.performance.mark = () => {};
-                    window.performance.measure = () => {};
-                }
-            """)
+            page = await new_scrape_page(browser)
 
             start_time = time.time()
             
             # Navigate to page
             await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            
-            # Check if stat type is available
-            try:
-                await page.wait_for_selector(f'text="{stat_label}"', timeout=5000)
-            except:
-                print(f"⚠️ {stat_label} not found on page. Skipping.")
-                return
-            
-            # Wait for player cards to load
-            try:
-                await page.wait_for_selector('[data-testid="playerStatCard"]', timeout=15000)
-                # Give a moment for dynamic content
-                await page.wait_for_timeout(3000)
-            except:
-                print(f"⚠️ {stat_label}: Player cards didn't load in time")
-                return
-
-            # Get page content
-            html = await page.content()
-            end_time = time.time()
-            
-            print(f"✅ {stat_label}: Page loaded in {end_time - start_time:.2f}s")
-            
-            # Save HTML for debugging
-            with open(f"data_p6/{stat_name}_p6.json", "w", encoding="utf-8") as f:
-                json.dump({"html": html}, f)
-
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(html, "html.parser")
-
-            # Get locked players
-            locked_players_set = set()
-            for card in soup.select('[data-testid="playerStatCard"]'):
-                name_tag = card.select_one('[data-testid="player-name"]')
-                if not name_tag:
-                    continue
-                name = name_tag.get_text(strip=True)
-                if card.find("use", {"href": "#lock-icon"}):
-                    locked_players_set.add(name)
-
-            # Get "Less than" players using page.evaluate for more reliable extraction
-            valid_players_set = set()
-            try:
-                buttons_data = await page.evaluate("""
-                    () => {
-                        const buttons = Array.from(document.querySelectorAll('button[aria-label*="for Less than"]'));
-                        return buttons.map(btn => btn.getAttribute('aria-label')).filter(label => label);
-                    }
-                """)
-                
-                for aria_label in buttons_data:
-                    match = player_regex.search(aria_label)
-                    if match:
-                        name = match.group(1).strip()
-                        if name != "Contest Fill":
-                            valid_players_set.add(name)
-            except Exception as e:
-                print(f"⚠️ {stat_label}: Error extracting player buttons - {e}")
-
-            # Exclude locked players
-            unlocked_valid_players = sorted([
-                name for name in valid_players_set
-                if normalize_to_initial_format(name) not in locked_players_set
-            ])
-
-            # Save results
-            with open(f"options/{stat_name}_options.json", "w", encoding="utf-8") as f:
-                json.dump(unlocked_valid_players, f, indent=4)
-
-            # Update locked.json globally
-            locked_file = "locked.json"
-            if os.path.exists(locked_file):
-                with open(locked_file, "r", encoding="utf-8") as f:
-                    existing_locked = set(json.load(f))
-            else:
-                existing_locked = set()
-
-            all_locked = sorted(existing_locked.union(locked_players_set))
-            with open(locked_file, "w", encoding="utf-8") as f:
-                json.dump(all_locked, f, indent=4)
-
-            print(f"✅ {stat_label}: {len(unlocked_valid_players)} options, {len(locked_players_set)} locked")
+
+            return await extract_stat(page, stat_name, stat_label, start_time)
 
         except Exception as e:
             print(f"❌ Error scraping {stat_label}: {e}")
         finally:
             await browser.close()
 
+async def switch_stat(page, stat_label, url):
+    """
+    Switches the already-loaded Pick6 page to another stat through the site's own
+    stat selector, so the app bundle and shared data aren't fetched again.
+    Only returns once the previous stat's cards are gone or have changed, so the card
+    wait in extract_stat can't pass on them. Falls back to a full navigation if the
+    in-app switch doesn't happen.
+    """
+    target_stat = parse_qs(urlparse(url).query).get("stat", [""])[0]
+    try:
+        previous_card = await page.query_selector('[data-testid="playerStatCard"]')
+        previous_text = await previous_card.inner_text() if previous_card else None
+        await page.click(f'text="{stat_label}"', timeout=5000)
+        await page.wait_for_function(
+            "stat => new URLSearchParams(location.search).get('stat') === stat",
+            arg=target_stat,
+            timeout=10000
+        )
+        if previous_card is not None:
+            # The old first card detaches, or the app reuses it and its content changes
+            await page.wait_for_function(
+                """([card, text]) => {
+                    const first = document.querySelector('[data-testid="playerStatCard"]');
+                    return !card.isConnected || (first !== null && first.innerText !== text);
+                }""",
+                arg=[previous_card, previous_text],
+                timeout=10000
+            )
+    except Exception:
+        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+
+async def scrape_all_stats_on_one_page():
+    """
+    Single-page mode: loads Pick6 once for the sport and walks every stat in
+    turn, so the heavy bootstrap is paid once per sport instead of once per stat.
+    Returns the locked players merged across stats.
+    """
+    all_locked = set()
+    async with async_playwright() as p:
+        browser = await connect_or_launch(p, browser_args)
+        try:
+            page = await new_scrape_page(browser)
+            loaded = False
+            for stat_name, (stat_label, url) in urls.items():
+                start_time = time.time()
+                try:
+                    if loaded:
+                        await switch_stat(page, stat_label, url)
+                    else:
+                        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                        loaded = True
+                    used_allowlist = allowlist is not None
+                    locked = await extract_stat(page, stat_name, stat_label, start_time)
+                    if locked is None and used_allowlist and allowlist is None:
+                        # Reload this stat with default blocking now that the allowlist is dropped
+                        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                        locked = await extract_stat(page, stat_name, stat_label, start_time)
+                    if locked is None:
+                        mark_failed(options_path(stat_name), f"{stat_label} didn't load")
+                    all_locked.update(locked or ())
+                except Exception as e:
+                    print(f"❌ Error scraping {stat_label}: {e}")
+                    mark_failed(options_path(stat_name), e)
+        finally:
+            await browser.close()
+    return all_locked
+
 def scrape_and_save(stat_name, stat_label, url):
     """
     Wrapper function to run the async scraper.
     """
     try:
-        asyncio.run(scrape_with_ultra_lightweight_playwright(stat_name, stat_label, url))
+        # Only start a browser once the governor sees enough free memory
+        with governor.slot():
+            used_allowlist = allowlist is not None
+            locked = asyncio.run(scrape_with_ultra_lightweight_playwright(stat_name, stat_label, url))
+            if locked is None and used_allowlist and allowlist is None:
+                # The allowlist was dropped during this stat; retry it with default blocking
+                locked = asyncio.run(scrape_with_ultra_lightweight_playwright(stat_name, stat_label, url))
+        if locked is None:
+            mark_failed(options_path(stat_name), f"{stat_label} didn't load")
+        return locked
     except Exception as e:
         print(f"❌ Fatal error for {stat_label}: {e}")
+        mark_failed(options_path(stat_name), e)
+
+def finish_scraping(all_locked):
+    """Writes the merged locked players and relearns the allowlist if needed, once every stat is done."""
+    # Locks are merged in memory and written once, so stat threads never race on the file
+    save_locked_players(all_locked)
+
+    # Learn the allowlist on request, or relearn it after it broke extraction
+    if os.getenv("P6_LEARN_ALLOWLIST") == "1" or allowlist_failed:
+        start_relearn(os.path.abspath(__file__))
 
 def run_scraping():
     """
@@ -245,25 +453,36 @@ def run_scraping():
     print("🚀 Starting ultra-lightweight PrizePicks scraper...")
     print("🎯 Optimized for Raspberry Pi with minimal resource usage")
     
+    reset_allowlist()
     clear_stats_files()
     
     start_time = time.time()
+    all_locked = set()
     
-    # Use fewer workers to reduce memory pressure on Pi
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        futures = [
-            executor.submit(scrape_and_save, stat, label, url) 
-            for stat, (label, url) in urls.items()
-        ]
-        for future in futures:
-            try:
-                future.result()
-            except Exception as e:
-                print(f"Thread error: {e}")
+    if single_page_mode:
+        wait_for_headroom()
+        all_locked = asyncio.run(scrape_all_stats_on_one_page())
+    else:
+        # Concurrency follows free memory so the Pi never starts swapping
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(scrape_and_save, stat, label, url) 
+                for stat, (label, url) in urls.items()
+            ]
+            for future in futures:
+                try:
+                    all_locked.update(future.result() or ())
+                except Exception as e:
+                    print(f"Thread error: {e}")
+
+    finish_scraping(all_locked)
     
     end_time = time.time()
     print(f"\n🎉 PrizePicks scraping completed in {end_time - start_time:.2f} seconds")
     print("📁 Results saved to 'options/' and 'data_p6/' folders")
 
 if __name__ == "__main__":
-    run_scraping()
+    if "--relearn-allowlist" in sys.argv:
+        asyncio.run(relearn_allowlist())
+    else:
+        run_scraping()
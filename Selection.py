@@ -2,6 +2,7 @@ import json
 import os
 from datetime import datetime
 import pytz
+from freshness import load_json
 
 # Function to normalize the minus sign to a regular hyphen
 def normalize_minus_sign(odds):
@@ -45,11 +46,12 @@ def format_matchup(matchup):
 
 # Function to process a given category (stat type)
 def process_category(category_name):
-    with open(f'lines/{category_name}_lines.json', 'r') as file:
-        lines_data = json.load(file)
-
-    with open(f'options/{category_name}_options.json', 'r') as file:
-        options_data = json.load(file)
+    # Stale copies are used within the staleness budget; beyond it the stat is skipped
+    lines_data = load_json(f'lines/{category_name}_lines.json')
+    options_data = load_json(f'options/{category_name}_options.json')
+    if lines_data is None or options_data is None:
+        print(f"Skipping {category_name}: Missing data file.")
+        return []
 
     selections = []
 
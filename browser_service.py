@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import subprocess
+from playwright.async_api import async_playwright
+
+# Files shared between the service and the ScrapeP6 scripts (relative to the repo root)
+root_dir = os.path.dirname(os.path.abspath(__file__))
+state_file = os.path.join(root_dir, "browser_service.json")
+storage_state_file = os.path.join(root_dir, "p6_storage_state.json")
+
+# Page used to warm cookies, local storage and consent for Pick6
+warm_url = "https://pick6.draftkings.com/"
+
+# Service tuning for the Pi
+port = int(os.getenv("P6_BROWSER_SERVICE_PORT", "9323"))
+health_interval = 60          # seconds between health checks
+rewarm_interval = 15 * 60     # seconds between storage state refreshes
+recycle_after = 6 * 60 * 60   # restart the browser after this long to bound memory
+max_failed_checks = 3
+
+# Same WebKit flags the ScrapeP6 scripts launch with
+browser_args = [
+    '--memory-pressure-off',
+    '--max_old_space_size=256',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+    '--single-process',
+    '--disable-background-timer-throttling',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-features=TranslateUI,BlinkGenPropertyTrees',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+]
+
+user_agent = 'Mozilla/5.0 (X11; Linux aarch64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+def read_state():
+    """Returns the running service's state, or None if no live service is registered."""
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    try:
+        os.kill(state["pid"], 0)
+    except (KeyError, OSError):
+        return None
+    return state
+
+def write_state(state):
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp_file, state_file)
+
+def clear_state():
+    if os.path.exists(state_file):
+        os.remove(state_file)
+
+def warm_context_options():
+    """
+    Extra new_context() options for scrapers: restores the cookies and local storage
+    saved by the service so the first Pick6 load skips consent and bootstrap requests.
+    """
+    if os.path.exists(storage_state_file):
+        return {"storage_state": storage_state_file}
+    return {}
+
+async def connect_or_launch(p, args):
+    """
+    Connects to the warm browser service if one is running, otherwise launches
+    WebKit locally exactly as before. The caller closes the returned browser either
+    way; for a connected browser that only disconnects and leaves the service up.
+    """
+    state = None if os.getenv("P6_BROWSER_SERVICE") == "0" else read_state()
+    if state:
+        try:
+            browser = await p.webkit.connect(state["ws_endpoint"], timeout=5000)
+            print("♻️ Connected to warm browser service")
+            return browser
+        except Exception as e:
+            print(f"⚠️ Browser service unavailable, launching locally - {e}")
+    return await p.webkit.launch(headless=True, args=args)
+
+def start_browser_server():
+    """
+    Starts a WebKit browser server with the Playwright CLI that ships with the Python
+    package and returns the process together with its websocket endpoint. The Python
+    API has no launch_server() and launch-server is an undocumented CLI command, so
+    requirements.txt pins the Playwright version it was checked against.
+    """
+    config_file = os.path.join(root_dir, ".browser_service_config.json")
+    with open(config_file, "w", encoding="utf-8") as f:
+        json.dump({"headless": True, "port": port, "args": browser_args}, f)
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "playwright", "launch-server", "--browser", "webkit", "--config", config_file],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    ws_endpoint = process.stdout.readline().strip()
+    if not ws_endpoint.startswith("ws"):
+        process.kill()
+        raise RuntimeError(f"Browser server failed to start: {ws_endpoint!r}")
+    return process, ws_endpoint
+
+def stop_browser_server(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+async def warm(browser):
+    """
+    Loads Pick6 in a fresh context seeded from the last storage state and saves the
+    refreshed cookies and local storage for scrapers to start from.
+    """
+    context = await browser.new_context(
+        viewport={'width': 800, 'height': 600},
+        ignore_https_errors=True,
+        user_agent=user_agent,
+        **warm_context_options()
+    )
+    try:
+        page = await context.new_page()
+        await page.goto(warm_url, wait_until="domcontentloaded", timeout=30000)
+        await page.wait_for_timeout(3000)
+        tmp_file = f"{storage_state_file}.tmp"
+        await context.storage_state(path=tmp_file)
+        os.replace(tmp_file, storage_state_file)
+    finally:
+        await context.close()
+
+async def healthy(process, browser):
+    if process.poll() is not None or not browser.is_connected():
+        return False
+    context = None
+    try:
+        context = await browser.new_context()
+        page = await context.new_page()
+        await asyncio.wait_for(page.goto("about:blank"), timeout=10)
+        return True
+    except Exception:
+        return False
+    finally:
+        # A failed probe still holds its context on the server
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+async def serve(stop_event):
+    """
+    Keeps one WebKit server alive for ScrapeP6 to connect to, restarting it when it
+    fails health checks and recycling it periodically so memory doesn't creep up.
+    """
+    async with async_playwright() as p:
+        while not stop_event.is_set():
+            process, ws_endpoint = start_browser_server()
+            started_at = time.time()
+            browser = None
+            try:
+                browser = await p.webkit.connect(ws_endpoint)
+                try:
+                    await warm(browser)
+                except Exception as e:
+                    print(f"⚠️ Warm-up failed, serving cold - {e}")
+                write_state({"pid": os.getpid(), "ws_endpoint": ws_endpoint, "started_at": started_at})
+                print(f"🔥 Browser service ready at {ws_endpoint}")
+
+                last_warm = time.time()
+                failed_checks = 0
+                while not stop_event.is_set():
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), timeout=health_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    if stop_event.is_set():
+                        break
+
+                    if await healthy(process, browser):
+                        failed_checks = 0
+                    else:
+                        failed_checks += 1
+                        print(f"⚠️ Health check failed ({failed_checks}/{max_failed_checks})")
+                        if failed_checks >= max_failed_checks or process.poll() is not None:
+                            print("🔄 Restarting unhealthy browser")
+                            break
+
+                    if time.time() - started_at > recycle_after:
+                        print("🔄 Recycling browser to release memory")
+                        break
+
+                    if time.time() - last_warm > rewarm_interval:
+                        try:
+                            await warm(browser)
+                        except Exception as e:
+                            print(f"⚠️ Re-warm failed - {e}")
+                        last_warm = time.time()
+            except Exception as e:
+                print(f"❌ Browser service error: {e}")
+                await asyncio.sleep(5)
+            finally:
+                clear_state()
+                if browser is not None:
+                    try:
+                        await browser.close()
+                    except Exception:
+                        pass
+                stop_browser_server(process)
+
+def main():
+    if read_state():
+        print("Browser service is already running.")
+        sys.exit(1)
+
+    async def run():
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+        await serve(stop_event)
+
+    asyncio.run(run())
+    print("Browser service stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+# Fingerprints and copies of every cached step's outputs, shared by every run workspace
+cache_dir = os.getenv("PIPELINE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".build_cache"))
+steps_dir = os.path.join(cache_dir, "steps")
+objects_dir = os.path.join(cache_dir, "objects")
+
+# PIPELINE_CACHE=0 runs every step regardless of its inputs
+enabled = os.getenv("PIPELINE_CACHE") != "0"
+
+# Unreferenced copies younger than this may belong to an overlapping run that hasn't recorded them yet
+prune_grace = 60 * 60
+
+def file_digest(path):
+    """sha256 of a file's bytes, or None if it doesn't exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def expand_inputs(inputs):
+    """Input paths, with glob patterns expanded to whatever matches right now."""
+    paths = []
+    for pattern in inputs:
+        if any(char in pattern for char in "*?["):
+            paths.extend(sorted(glob.glob(pattern)))
+        else:
+            paths.append(pattern)
+    return paths
+
+def fingerprint(step, args, inputs, params):
+    """Hashes everything a step's output depends on: its arguments, parameters and input files' contents."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([step, list(args), params], sort_keys=True, default=str).encode("utf-8"))
+    for path in expand_inputs(inputs):
+        digest.update(f"\0{path}\0{file_digest(path) or 'missing'}".encode("utf-8"))
+    return digest.hexdigest()
+
+def entry_path(step):
+    return os.path.join(steps_dir, step.replace(":", "__").replace("/", "_") + ".json")
+
+def load_entry(step):
+    try:
+        with open(entry_path(step), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def atomic_copy(source, destination):
+    tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+def restore(entry):
+    """Puts back any recorded output that's missing or was changed. False if its stored copy is gone."""
+    for path, digest in entry["outputs"].items():
+        if file_digest(path) == digest:
+            continue
+        blob = os.path.join(objects_dir, digest)
+        if not os.path.exists(blob):
+            return False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        atomic_copy(blob, path)
+    return True
+
+def store(step, key, outputs, result):
+    os.makedirs(steps_dir, exist_ok=True)
+    os.makedirs(objects_dir, exist_ok=True)
+    recorded = {}
+    for path in outputs:
+        digest = file_digest(path)
+        if digest is None:
+            continue
+        blob = os.path.join(objects_dir, digest)
+        if not os.path.exists(blob):
+            atomic_copy(path, blob)
+        recorded[path] = digest
+    tmp_path = f"{entry_path(step)}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"fingerprint": key, "outputs": recorded, "result": result}, f)
+    os.replace(tmp_path, entry_path(step))
+
+def cached_call(step, func, args=(), inputs=(), outputs=(), params=None):
+    """
+    Runs func(*args) unless the step's inputs, arguments and parameters hash the same
+    as on its last run, in which case the recorded outputs are left (or put back) in
+    place untouched and the stored return value is returned instead. `params` may be
+    a callable, for parameters only known once the step is about to run.
+    """
+    if not enabled:
+        return func(*args)
+    if callable(params):
+        params = params()
+    key = fingerprint(step, args, inputs, params or {})
+    entry = load_entry(step)
+    if entry is not None and entry["fingerprint"] == key and restore(entry):
+        print(f"♻️ {step}: inputs unchanged, reusing cached output")
+        return entry["result"]
+    result = func(*args)
+    store(step, key, outputs, result)
+    return result
+
+def prune():
+    """Deletes stored output copies no step entry refers to anymore."""
+    if not os.path.isdir(objects_dir):
+        return 0
+    referenced = set()
+    for name in os.listdir(steps_dir):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(steps_dir, name), "r") as f:
+                    referenced.update(json.load(f)["outputs"].values())
+            except (OSError, json.JSONDecodeError, KeyError):
+                continue
+    removed = 0
+    cutoff = time.time() - prune_grace
+    for name in os.listdir(objects_dir):
+        path = os.path.join(objects_dir, name)
+        if name not in referenced and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    return removed
@@ -0,0 +1,197 @@
+import os
+import ast
+import json
+import heapq
+from itertools import islice, product
+from parlay_engine import (
+    build_leg_table, selection_odds, top_entries, parlay_entry, parlay_odds_of,
+)
+
+# Where each sport's Picks reads its legs
+sport_prefixes = {"nba": "", "wnba": "wnba/", "mlb": "mlb/", "nhl": "nhl/"}
+root_dir = os.path.dirname(os.path.abspath(__file__))
+
+leaderboard_size = int(os.getenv("PICKS_LEADERBOARD_SIZE", "25"))
+max_legs = int(os.getenv("PICKS_MAX_LEGS", "3"))
+output_file = "leaderboard.json"
+
+def read_payout_table(prefix):
+    """
+    Reads `payout_table` ({legs: (implied payout, vig payout)}) out of a sport's Picks.py
+    without importing it, since Picks scores and writes its picks at import time.
+    """
+    path = os.path.join(root_dir, prefix, "Picks.py")
+    with open(path, "r") as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "payout_table" for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"{path} has no payout_table")
+
+sport_payouts = {sport: read_payout_table(prefix) for sport, prefix in sport_prefixes.items()}
+# Mixed-sport entries are priced like a standard Pick6 entry
+mixed_payouts = sport_payouts["nba"]
+
+def load_sport_selections():
+    """Returns {sport: selections sorted like Picks sorts them} for every sport with a selections file."""
+    slates = {}
+    for sport, prefix in sport_prefixes.items():
+        path = os.path.join(f"{prefix}selections", "selections.json")
+        try:
+            with open(path, "r") as f:
+                selections = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        if selections:
+            slates[sport] = sorted(selections, key=selection_odds)
+    return slates
+
+def combo_prob(legs, combo):
+    combined = 1.0
+    for i in combo:
+        combined *= float(legs["prob"][i])
+    return combined
+
+def likely_combos(legs, k):
+    """
+    Lazily yields (probability, combo) from most to least likely: branch-and-bound
+    windows growing 4x. Single legs come straight from the table, which is already
+    sorted from most to least likely.
+    """
+    if k == 1:
+        for i in range(len(legs["selections"])):
+            yield combo_prob(legs, (i,)), (i,)
+        return
+    yielded = 0
+    limit = leaderboard_size * 4
+    while True:
+        combos = top_entries(legs, k, limit)
+        for combo in combos[yielded:]:
+            yield combo_prob(legs, combo), combo
+        if len(combos) < limit:
+            return
+        yielded = len(combos)
+        limit *= 4
+
+def sport_stream(sport, legs, k):
+    """
+    One sport's own k-leg entries, best edge first, tagged for the leaderboard. The
+    payout is fixed for a sport and size, so the most likely entries have the best edge;
+    the key is that edge so entries from sports with different payouts merge fairly.
+    """
+    implied_payout, vig_payout = sport_payouts[sport][k]
+    for combined, combo in likely_combos(legs, k):
+        entry = parlay_entry(legs, combo, parlay_odds_of(legs, combo), implied_payout, vig_payout)
+        entry['sports'] = [sport]
+        yield (-implied_payout * combined,), entry
+
+def split_counts(sports, k):
+    """Every way to split k legs over two or more sports, as {sport: leg count}."""
+    for counts in product(range(k + 1), repeat=len(sports)):
+        if sum(counts) == k and sum(1 for count in counts if count) >= 2:
+            yield {sport: count for sport, count in zip(sports, counts) if count}
+
+class LazyCombos:
+    """A likely_combos() stream that can be indexed, reading only as far as asked."""
+    def __init__(self, legs, k):
+        self.stream = likely_combos(legs, k)
+        self.items = []
+
+    def get(self, index):
+        while len(self.items) <= index:
+            item = next(self.stream, None)
+            if item is None:
+                return None
+            self.items.append(item)
+        return self.items[index]
+
+def split_stream(sport_legs, counts):
+    """
+    Mixed entries with exactly `counts` legs from each sport, most likely first. Legs
+    from different sports never conflict, so an entry is one combo per sport and its
+    probability is their product; each per-sport stream is most likely first, so a heap
+    frontier over their indices pops entries in order and reads only what it yields.
+    """
+    groups = [(sport, LazyCombos(sport_legs[sport], count)) for sport, count in counts.items()]
+
+    def picks(index):
+        return [combos.get(i) for (_, combos), i in zip(groups, index)]
+
+    def product_prob(chosen):
+        combined = 1.0
+        for prob, _ in chosen:
+            combined *= prob
+        return combined
+
+    start = (0,) * len(groups)
+    chosen = picks(start)
+    if None in chosen:
+        return
+    frontier = [(-product_prob(chosen), start)]
+    seen = {start}
+    while frontier:
+        negated, index = heapq.heappop(frontier)
+        yield -negated, [(sport, combo) for (sport, _), (_, combo) in zip(groups, picks(index))]
+        for position in range(len(groups)):
+            successor = index[:position] + (index[position] + 1,) + index[position + 1:]
+            if successor in seen:
+                continue
+            chosen = picks(successor)
+            if None not in chosen:
+                seen.add(successor)
+                heapq.heappush(frontier, (-product_prob(chosen), successor))
+
+def mixed_stream(sport_legs, combined_legs, positions, k):
+    """
+    Entries that span two or more sports, best edge first. Each split of the k legs
+    over the sports is its own ordered stream and the streams are merged, so
+    single-sport combinations are never generated here and the combined C(n, k) space
+    is never enumerated. `positions` maps (sport, leg) to the combined leg table.
+    """
+    implied_payout, vig_payout = mixed_payouts[k]
+    splits = [split_stream(sport_legs, counts) for counts in split_counts(sorted(sport_legs), k)]
+    for combined, parts in heapq.merge(*splits, key=lambda item: -item[0]):
+        combo = sorted(positions[sport, leg] for sport, part in parts for leg in part)
+        entry = parlay_entry(combined_legs, combo, parlay_odds_of(combined_legs, combo), implied_payout, vig_payout)
+        entry['sports'] = sorted(sport for sport, _ in parts)
+        yield (-implied_payout * combined,), entry
+
+def build_leaderboard(slates, sizes, size=None):
+    """
+    Global top-K per entry size by edge against each entry's own payout: a k-way heap
+    merge of every sport's ranked stream and the mixed-sport stream. Each stream is
+    already in rank order, so the merge reads only about K entries from each.
+    """
+    size = size or leaderboard_size
+    sport_legs = {sport: build_leg_table(selections) for sport, selections in slates.items()}
+    combined = sorted(
+        ((selection, sport, leg) for sport, selections in slates.items() for leg, selection in enumerate(selections)),
+        key=lambda item: selection_odds(item[0]),
+    )
+    combined_legs = build_leg_table([selection for selection, _, _ in combined])
+    positions = {(sport, leg): position for position, (_, sport, leg) in enumerate(combined)}
+
+    leaderboard = {}
+    for k in sizes:
+        streams = [sport_stream(sport, legs, k) for sport, legs in sport_legs.items()]
+        if len(slates) > 1:
+            streams.append(mixed_stream(sport_legs, combined_legs, positions, k))
+        merged = heapq.merge(*streams, key=lambda item: item[0])
+        leaderboard[str(k)] = [entry for _, entry in islice(merged, size)]
+    return leaderboard
+
+def main():
+    slates = load_sport_selections()
+    if not slates:
+        print("❌ No sport has a selections.json, nothing to rank")
+        return
+    leaderboard = build_leaderboard(slates, range(2, max_legs + 1))
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(leaderboard, f, indent=4)
+    os.replace(tmp_file, output_file)
+    mixed = sum(1 for entries in leaderboard.values() for entry in entries if len(entry['sports']) > 1)
+    print(f"🏆 Cross-sport leaderboard for {', '.join(slates)} saved to {output_file} ({mixed} mixed-sport entries)")
+
+if __name__ == "__main__":
+    main()
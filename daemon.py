@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import glob
+import time
+import fcntl
+import signal
+import importlib
+import threading
+import subprocess
+from datetime import datetime
+import build_cache
+import pipeline
+from workspace import published_dir
+
+root_dir = os.path.dirname(os.path.abspath(__file__))
+lock_file = os.path.join(root_dir, "daemon.lock")
+
+# Refresh interval by how soon a sport's next game starts: (starts within, refresh every), in seconds
+cadence = [
+    (60 * 60, int(os.getenv("DAEMON_NEAR_INTERVAL", "300"))),
+    (3 * 60 * 60, int(os.getenv("DAEMON_SOON_INTERVAL", "900"))),
+    (24 * 60 * 60, int(os.getenv("DAEMON_DAY_INTERVAL", "1800"))),
+]
+
+# With no games in the next day, only look this often for a new slate being posted
+idle_interval = int(os.getenv("DAEMON_IDLE_INTERVAL", str(6 * 60 * 60)))
+
+# Start the warm browser service alongside the daemon unless one is already running
+use_browser_service = os.getenv("DAEMON_BROWSER_SERVICE", "1") == "1"
+
+stop_requested = threading.Event()
+reload_requested = threading.Event()
+wake = threading.Event()
+
+def acquire_lock():
+    """
+    Takes an exclusive lock on daemon.lock, held for the daemon's lifetime, so only one
+    instance runs. Returns the open lock file, or None if another instance holds it.
+    """
+    handle = open(lock_file, "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+def parse_game_time(value):
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00").replace(".0000000", ".000000")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+def next_game_start(sport, now):
+    """Earliest game start still ahead, from the game times in the sport's last extracted lines."""
+    upcoming = None
+    base = (published_dir() if pipeline.use_workspaces else None) or root_dir
+    for path in glob.glob(os.path.join(base, sport, "lines", "*_lines.json")):
+        try:
+            with open(path, "r") as f:
+                players = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for player in players:
+            start = parse_game_time(player.get("gameTime"))
+            if start is not None and start > now and (upcoming is None or start < upcoming):
+                upcoming = start
+    return upcoming
+
+def refresh_interval(sport, now):
+    """Seconds until the sport's next refresh: tighter as its first game nears, idle when nothing is scheduled."""
+    start = next_game_start(sport, now)
+    if start is None:
+        return idle_interval
+    until = start - now
+    for horizon, interval in cadence:
+        if until <= horizon:
+            return interval
+    # Wake up again once the game comes inside the day window
+    return max(cadence[-1][1], min(idle_interval, until - cadence[-1][0]))
+
+def start_browser_service():
+    """Starts browser_service.py unless a live one is registered; returns the process if this daemon owns it."""
+    from browser_service import read_state
+    if read_state() is not None:
+        return None
+    print("🔥 Starting the warm browser service")
+    return subprocess.Popen([sys.executable, os.path.join(root_dir, "browser_service.py")])
+
+def handle_signal(signum, frame):
+    if signum == signal.SIGHUP:
+        reload_requested.set()
+    else:
+        stop_requested.set()
+    wake.set()
+
+def reload(pools):
+    """
+    Picks up edited code between runs: the pipeline and cache modules are reloaded, the
+    sport scripts re-imported on next use, and the CPU workers replaced. The run lock and
+    retry timers live in pipeline_state, which isn't reloaded, so they carry over.
+    """
+    for pool in pools:
+        pool.shutdown(wait=True)
+    # Pending stat retries would run the old code; the next scheduled refresh covers them
+    with pipeline.run_lock:
+        pipeline.cancel_retries()
+    importlib.reload(build_cache)
+    importlib.reload(pipeline)
+    print("🔄 Reloaded pipeline code")
+    return pipeline.make_pools()
+
+def run_daemon():
+    """
+    Keeps the pipeline resident: refreshes each sport on its own cadence, reusing the
+    worker pools, imported scripts, DK sessions and the browser service between runs.
+    SIGHUP reloads code after the current run; SIGTERM/SIGINT stop after it.
+    """
+    os.chdir(root_dir)
+    lock = acquire_lock()
+    if lock is None:
+        print("Daemon is already running.")
+        sys.exit(1)
+
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, handle_signal)
+
+    service = start_browser_service() if use_browser_service else None
+    pools = pipeline.make_pools()
+    next_run = {sport: 0.0 for sport in pipeline.sports}
+    print(f"🕒 Daemon {os.getpid()} scheduling {', '.join(next_run)}")
+    try:
+        while not stop_requested.is_set():
+            if reload_requested.is_set():
+                reload_requested.clear()
+                pools = reload(pools)
+                # The reloaded pipeline may configure a different set of sports
+                next_run = {sport: next_run.get(sport, 0.0) for sport in pipeline.sports}
+                print(f"🕒 Scheduling {', '.join(next_run)}")
+
+            due = [sport for sport, at in next_run.items() if at <= time.time()]
+            if due:
+                try:
+                    pipeline.run_pipeline(due, pools)
+                except Exception as e:
+                    print(f"❌ Refresh of {', '.join(due)} failed: {e}")
+                now = time.time()
+                for sport in due:
+                    next_run[sport] = now + refresh_interval(sport, now)
+                    stamp = datetime.fromtimestamp(next_run[sport]).strftime("%H:%M")
+                    print(f"🗓️ {sport}: next refresh at {stamp}")
+                continue
+
+            wake.wait(max(0.0, min(next_run.values(), default=time.time() + idle_interval) - time.time()))
+            wake.clear()
+    finally:
+        pipeline.cancel_retries()
+        for pool in pools:
+            pool.shutdown(wait=True)
+        if service is not None:
+            service.terminate()
+            service.wait()
+        lock.close()
+        print("Daemon stopped.")
+
+if __name__ == "__main__":
+    run_daemon()
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import threading
+
+# How long a failed refresh may keep serving the last good copy of a per-stat file
+stale_budget = int(os.getenv("PIPELINE_STALE_BUDGET", str(2 * 60 * 60)))
+
+def sidecar(path):
+    """Freshness record for `path`: a hidden file next to it, so the repo's *.json globs skip it."""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.meta")
+
+def read_meta(path):
+    try:
+        with open(sidecar(path), "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def write_meta(path, meta):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{sidecar(path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, sidecar(path))
+
+def mark_fresh(path):
+    write_meta(path, {"updated": time.time(), "state": "fresh"})
+
+def mark_failed(path, error):
+    """
+    Records a failed refresh. The last good file is left in place and served as stale
+    until it's older than `stale_budget`.
+    """
+    meta = read_meta(path) or {}
+    updated = meta.get("updated")
+    if updated is None and os.path.exists(path):
+        # Written before freshness was tracked
+        updated = os.path.getmtime(path)
+    write_meta(path, {"updated": updated, "state": "stale", "failed_at": time.time(), "error": str(error)})
+    if updated is None:
+        print(f"⚠️ {path}: refresh failed and there's no earlier copy to serve")
+    else:
+        print(f"⚠️ {path}: refresh failed, serving the copy from {(time.time() - updated) / 60:.0f} minutes ago")
+
+def derive(path, source):
+    """Marks `path` as computed from `source`, so it shares the source's freshness."""
+    if (read_meta(path) or {}).get("source") != source:
+        write_meta(path, {"source": source})
+
+def state(path):
+    """'fresh', 'stale' (last refresh failed, still within budget), 'expired' or 'missing'."""
+    meta = read_meta(path)
+    if meta is not None and "source" in meta:
+        return state(meta["source"]) if os.path.exists(path) else "missing"
+    if not os.path.exists(path):
+        return "missing"
+    if meta is None:
+        return "fresh"
+    if meta["state"] == "stale" and (meta["updated"] is None or time.time() - meta["updated"] > stale_budget):
+        return "expired"
+    return meta["state"]
+
+def load_json(path, default=None):
+    """Reads a per-stat file, or returns `default` if it's missing, unreadable or stale beyond the budget."""
+    current = state(path)
+    if current == "missing":
+        return default
+    if current == "expired":
+        print(f"⚠️ {path}: last good copy is older than the staleness budget, not using it")
+        return default
+    if current == "stale":
+        print(f"⚠️ {path}: serving stale copy")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ {path}: unreadable - {e}")
+        return default
@@ -161,9 +161,11 @@ def generate_parlay_builder_data():
             print(f"🎉 {output_filename} has been successfully uploaded to GitHub!")
         else:
             print(f"⚠️ Local file {output_filename} generated, but GitHub upload failed.")
+        return upload_success
             
     except Exception as e:
         print(f"⚠️ Error during GitHub upload for {output_filename}: {str(e)}")
+        return False
 
 def generate_parlays():
     """
@@ -239,9 +241,11 @@ def generate_parlays():
             print("🎉 Parlays have been successfully uploaded to GitHub!")
         else:
             print("⚠️ Local file generated successfully, but GitHub upload failed")
+        return upload_success
             
     except Exception as e:
         print(f"⚠️ Error during GitHub upload: {str(e)}")
+        return False
 
 if __name__ == "__main__":
     generate_parlays()
@@ -0,0 +1,181 @@
+import os
+import json
+from math import comb
+from itertools import islice
+import numpy as np
+from parlay_engine import (
+    combination_chunks, conflict_free, score_combos, top_parlays,
+    best_first_parlays, iter_sorted_parlays, parlay_entry, conflict_rules, enumeration_mode,
+)
+
+# Incremental rankings only pay off against PICKS_ENUMERATION=window, which scans every
+# combination per window. The default best-first walk already stops after the few
+# thousand entries the selectors read, and beats rescoring the delta on a normal slate,
+# so in that mode incremental_parlays() hands back the best-first iterators instead.
+
+# Ranked 2/3-leg entries kept between runs, per size
+state_limit = int(os.getenv("PICKS_STATE_LIMIT", "20000"))
+
+# Below this many still-exact entries the ranking is rebuilt from scratch instead
+refresh_floor = state_limit // 4
+
+# When more than this share of all k-leg combinations touch a changed line, rescoring
+# the delta costs about as much as the full windowed scan, which is used instead
+delta_share = float(os.getenv("PICKS_DELTA_SHARE", "0.5"))
+
+def load_state(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_state(path, legs, rankings):
+    state = {
+        "selections": legs["selections"],
+        "rules": sorted(conflict_rules),
+        "rankings": {
+            str(k): {"combos": combos.tolist(), "odds": odds.tolist(), "truncated": truncated}
+            for k, (combos, odds, truncated) in rankings.items()
+        },
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def rank(combos, odds, limit):
+    """Sorts by (parlay odds, combinations order) and keeps the first `limit`."""
+    order = np.lexsort(tuple(combos[:, c] for c in reversed(range(combos.shape[1]))) + (odds,))[:limit]
+    return combos[order], odds[order]
+
+def full_ranking(legs, k, limit):
+    combos, odds = top_parlays(legs, k, limit)
+    return combos.astype(np.int64), odds, len(odds) >= limit
+
+def touching_count(n, k, changed_count):
+    """How many k-leg combinations include at least one of `changed_count` changed legs, conflicts included."""
+    return comb(n, k) - comb(n - changed_count, k)
+
+def touching_combos(legs, k, changed):
+    """
+    Yields every conflict-free k-leg combination that includes at least one changed
+    leg, each exactly once, as sorted blocks: a combination is generated from its
+    lowest changed leg, with the other legs drawn from everything except that leg and
+    lower changed legs. Blocks come from combination_chunks(), so memory stays bounded.
+    """
+    n = len(legs["selections"])
+    excluded = set()
+    for leg in sorted(changed):
+        excluded.add(leg)
+        others = np.array([i for i in range(n) if i not in excluded], dtype=np.int64)
+        if len(others) < k - 1:
+            continue
+        for rest in combination_chunks(len(others), k - 1):
+            block = np.sort(np.hstack([np.full((len(rest), 1), leg, dtype=np.int64), others[rest]]), axis=1)
+            block = block[conflict_free(legs, block)]
+            if len(block):
+                yield block
+
+def update_ranking(legs, k, previous, old_to_new, changed, limit):
+    """
+    Brings a stored top-`limit` ranking up to date with the new slate. Entries whose
+    legs all kept their price carry over (re-indexed and re-scored in the new leg
+    order); only entries touching changed legs are enumerated and scored, keeping the
+    best `limit` as the blocks stream in. Returns (combos, odds, truncated) holding
+    just the prefix that is provably exact.
+    """
+    bound = np.inf
+    prev_combos = np.array(previous["combos"], dtype=np.int64).reshape(-1, k)
+    if previous["truncated"] and len(previous["odds"]):
+        # Anything the old list cut had odds >= its last entry; re-scoring in a new
+        # leg order can move rounding by one, so stay one below that
+        bound = previous["odds"][-1] - 1
+
+    mapped = old_to_new[prev_combos] if len(prev_combos) else prev_combos
+    kept = mapped[(mapped >= 0).all(axis=1)] if len(mapped) else mapped
+    kept = np.sort(kept, axis=1)
+    kept = kept[conflict_free(legs, kept)] if len(kept) else kept
+
+    fresh = np.empty((0, k), dtype=np.int64)
+    fresh_odds = np.empty(0, dtype=np.int64)
+    cut = False
+    for block in touching_combos(legs, k, changed):
+        fresh = np.vstack([fresh, block])
+        fresh_odds = np.concatenate([fresh_odds, score_combos(legs, block)])
+        if len(fresh) > limit:
+            fresh, fresh_odds = rank(fresh, fresh_odds, limit)
+            cut = True
+    if cut:
+        # Every entry dropped along the way had odds >= the final limit-th entry
+        bound = min(bound, fresh_odds[-1])
+
+    combos = np.vstack([kept, fresh]).astype(np.int64)
+    odds = np.concatenate([score_combos(legs, kept) if len(kept) else np.empty(0, dtype=np.int64), fresh_odds])
+    if not len(combos):
+        return combos, odds, bool(bound != np.inf)
+    combos, odds = rank(combos, odds, limit)
+    exact = odds < bound
+    truncated = bool(bound != np.inf or len(odds) >= limit)
+    return combos[exact], odds[exact], truncated
+
+def slate_delta(legs, previous_selections):
+    """
+    Maps the previous run's leg ids to this run's (-1 where the line was removed or
+    re-priced) and lists the new leg ids that weren't priced like this last time.
+    """
+    new_index = {selection: i for i, selection in enumerate(legs["selections"])}
+    old_to_new = np.array([new_index.get(selection, -1) for selection in previous_selections], dtype=np.int64)
+    unchanged = set(old_to_new[old_to_new >= 0].tolist())
+    changed = [i for i in range(len(legs["selections"])) if i not in unchanged]
+    return old_to_new, changed
+
+def ranked_parlays(legs, k, combos, odds, truncated, implied_payout, vig_payout):
+    """Yields the exact stored prefix, then continues from the full best-first order if the selectors read past it."""
+    for combo, parlay_odds in zip(combos.tolist(), odds.tolist()):
+        yield parlay_entry(legs, combo, parlay_odds, implied_payout, vig_payout)
+    if truncated:
+        for combo, parlay_odds in islice(best_first_parlays(legs, k), len(odds), None):
+            yield parlay_entry(legs, combo, parlay_odds, implied_payout, vig_payout)
+
+def incremental_parlays(legs, state_path, payout_table, sizes=(2, 3)):
+    """
+    Returns ranked entry iterators per size, identical to iter_sorted_parlays(), built
+    from the last run's stored rankings plus only the entries touching added or
+    re-priced lines. Big moves (or a first run) fall back to a full ranking, decided
+    from the delta's size before anything is enumerated. Saves the refreshed rankings
+    for the next run. Outside window mode it returns the plain best-first iterators.
+    """
+    if enumeration_mode != "window":
+        print("♻️ Incremental Picks only speeds up PICKS_ENUMERATION=window, walking best-first instead")
+        return [iter_sorted_parlays(legs, k, *payout_table[k]) for k in sizes]
+
+    state = load_state(state_path)
+    usable = (
+        state is not None
+        and state.get("rules") == sorted(conflict_rules)
+        and len(set(legs["selections"])) == len(legs["selections"])
+    )
+    if usable:
+        old_to_new, changed = slate_delta(legs, state["selections"])
+        print(f"♻️ Incremental Picks: {len(changed)} of {len(legs['selections'])} lines changed since the last run")
+
+    rankings = {}
+    for k in sizes:
+        previous = state["rankings"].get(str(k)) if usable else None
+        n = len(legs["selections"])
+        if previous is not None and touching_count(n, k, len(changed)) > delta_share * comb(n, k):
+            print(f"♻️ Incremental Picks: most {k}-leg entries touch a changed line, ranking them from scratch")
+            previous = None
+        ranking = None
+        if previous is not None:
+            ranking = update_ranking(legs, k, previous, old_to_new, changed, state_limit)
+            if ranking[2] and len(ranking[1]) < refresh_floor:
+                ranking = None
+        rankings[k] = ranking or full_ranking(legs, k, state_limit)
+
+    save_state(state_path, legs, rankings)
+    return [
+        ranked_parlays(legs, k, *rankings[k], *payout_table[k])
+        for k in sizes
+    ]
@@ -1,3 +1,4 @@
+import os
 import subprocess
 import threading
 import time
@@ -31,9 +32,8 @@ def run_parallel(scripts):
     for thread in threads:
         thread.join()
 
-def main():
-    """Main function to orchestrate the scraping process."""
-    print("Starting the scraping process...")
+def run_staged():
+    """The original stage-by-stage run: every sport's scripts as subprocesses, one stage at a time."""
 
     # Define the order of execution
     # WNBA
@@ -75,6 +75,10 @@ def main():
     parallel_picks_scripts = [wnba_picks, mlb_picks, nhl_picks]
     run_parallel(parallel_picks_scripts)
 
+    # Rank every sport's entries, plus mixed-sport ones, on one leaderboard
+    print("\n----- Ranking Across Sports -----")
+    run_script('cross_sport.py')
+
     # Run Selection scripts in parallel
     print("\n----- Generating Selections -----")
     parallel_selection_scripts = [wnba_selection, mlb_selection, nhl_selection]
@@ -89,6 +93,17 @@ def main():
     print("\n----- Generating Premade Parlays -----")
     run_script('generate_parlays.py')
 
+def main():
+    """Main function to orchestrate the scraping process."""
+    print("Starting the scraping process...")
+
+    if os.getenv("PIPELINE_STAGED") == "1":
+        run_staged()
+    else:
+        # Each sport/stat step starts as soon as its own inputs are ready
+        from pipeline import run_pipeline
+        run_pipeline()
+
     print("\nScraping process completed!")
 
 if __name__ == "__main__":
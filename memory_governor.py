@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Memory kept free for the OS, the other sports' scrapers and page cache (MB)
+reserve_mb = int(os.getenv("P6_MEMORY_RESERVE_MB", "200"))
+
+# Starting guess for one WebKit page + driver before anything has been measured (MB)
+default_slot_mb = 250
+
+# Concurrent stat scrapes the governor starts at: the two workers ScrapeP6 always used
+initial_workers = 2
+
+# Command-line markers of the Playwright driver and its WebKit processes
+browser_markers = ("playwright", "webkit")
+
+# Registered by browser_service.py while the warm browser service is running
+service_state_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "browser_service.json")
+
+def read_meminfo():
+    """Returns /proc/meminfo values in MB, or None where /proc isn't available."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            info = {}
+            for line in f:
+                key, value = line.split(":", 1)
+                info[key] = int(value.split()[0]) // 1024
+            return info
+    except (OSError, ValueError):
+        return None
+
+def available_mb():
+    info = read_meminfo()
+    if info is None:
+        return None
+    return info.get("MemAvailable", info.get("MemFree", 0))
+
+def worker_ceiling():
+    """
+    Most concurrent stat scrapes across every sport in the process: two per CPU (page
+    loads mostly wait on the network), no more than total memory less the reserve holds
+    at the starting per-slot guess, and never below the starting concurrency.
+    P6_MAX_WORKERS, when set, caps it explicitly; the governor decides how many actually run.
+    """
+    ceiling = 2 * (os.cpu_count() or 1)
+    info = read_meminfo()
+    if info and "MemTotal" in info:
+        ceiling = min(ceiling, (info["MemTotal"] - reserve_mb) // default_slot_mb)
+    ceiling = max(initial_workers, ceiling)
+    if os.getenv("P6_MAX_WORKERS"):
+        ceiling = min(ceiling, int(os.getenv("P6_MAX_WORKERS")))
+    return max(1, ceiling)
+
+max_workers = worker_ceiling()
+
+def read_processes():
+    """Every process's parent pid, RSS (MB) and lowercased command line, from /proc."""
+    processes = {}
+    try:
+        pids = [int(pid) for pid in os.listdir("/proc") if pid.isdigit()]
+    except OSError:
+        return processes
+    for pid in pids:
+        try:
+            ppid = rss = None
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("PPid:"):
+                        ppid = int(line.split()[1])
+                    elif line.startswith("VmRSS:"):
+                        rss = int(line.split()[1]) // 1024
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode("utf-8", "replace").lower()
+            processes[pid] = (ppid, rss or 0, cmdline)
+        except (OSError, ValueError):
+            continue
+    return processes
+
+def browser_service_pid():
+    """Pid of the warm browser service, if one is registered and alive."""
+    try:
+        with open(service_state_file, "r", encoding="utf-8") as f:
+            pid = json.load(f)["pid"]
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def browser_rss_mb():
+    """
+    Sums the RSS of the Playwright driver and WebKit processes this process launched,
+    plus the warm browser service's tree when scrapes connect to it instead. Other
+    children, like the pipeline's CPU workers, aren't counted.
+    """
+    processes = read_processes()
+    children = {}
+    for pid, (ppid, _, _) in processes.items():
+        children.setdefault(ppid, []).append(pid)
+
+    def tree_mb(root_pid, only_browsers):
+        total = 0
+        stack = list(children.get(root_pid, []))
+        while stack:
+            pid = stack.pop()
+            _, rss, cmdline = processes[pid]
+            if not only_browsers or any(marker in cmdline for marker in browser_markers):
+                total += rss
+            stack.extend(children.get(pid, []))
+        return total
+
+    total = tree_mb(os.getpid(), only_browsers=True)
+    service_pid = browser_service_pid()
+    if service_pid is not None and service_pid != os.getpid():
+        total += tree_mb(service_pid, only_browsers=False)
+    return total
+
+class RssSampler:
+    """
+    Samples browser_rss_mb() on a background thread and keeps the peak, so a peak is the
+    highest reading while the work ran rather than one taken after it. With `share`, each
+    reading is divided by share() first, and skipped while share() is 0.
+    """
+
+    def __init__(self, interval=0.05, share=None):
+        self.interval = interval
+        self.share = share
+        self.peak_mb = 0.0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def read(self):
+        if self.share is None:
+            return browser_rss_mb()
+        count = self.share()
+        return browser_rss_mb() / count if count else 0.0
+
+    def run(self):
+        while not self.stopped.is_set():
+            reading = self.read()
+            with self.lock:
+                self.peak_mb = max(self.peak_mb, reading)
+            self.stopped.wait(self.interval)
+
+    def reset(self):
+        """Starts a new peak from the current reading and returns the previous one."""
+        reading = self.read()
+        with self.lock:
+            peak, self.peak_mb = self.peak_mb, reading
+        return peak
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class MemoryGovernor:
+    """
+    Admits browser work only while the machine has memory headroom.
+    The concurrency limit shrinks under pressure and grows back when memory frees up,
+    and the per-slot cost is learned from the peak RSS of the browsers in use, sampled
+    while scrapes run so a closing browser doesn't make a slot look cheap. Use the shared
+    `governor` below, so every sport's scrapes in one process count against one cap.
+    """
+
+    def __init__(self, max_workers, initial_workers=initial_workers, poll_interval=0.5):
+        self.max_workers = max_workers
+        self.limit = min(initial_workers, max_workers)
+        self.poll_interval = poll_interval
+        self.slot_mb = default_slot_mb
+        self.active = 0
+        self.sampler = None
+        self.condition = threading.Condition()
+
+    def headroom_mb(self):
+        available = available_mb()
+        if available is None:
+            return None
+        return available - reserve_mb
+
+    def measure(self):
+        """Folds the highest per-slot browser RSS seen since the last measurement into the estimate."""
+        if self.sampler is None:
+            return
+        peak_mb = self.sampler.reset()
+        if peak_mb:
+            self.slot_mb = max(64, int(0.7 * self.slot_mb + 0.3 * peak_mb))
+
+    def can_admit(self):
+        if self.active == 0:
+            # Always let one scrape through so the run makes progress
+            return True
+        if self.active >= self.limit:
+            return False
+        headroom = self.headroom_mb()
+        return headroom is None or headroom >= self.slot_mb
+
+    def adjust(self):
+        headroom = self.headroom_mb()
+        if headroom is None:
+            return
+        if headroom < 0 and self.limit > 1:
+            self.limit -= 1
+            print(f"🧠 Memory pressure ({headroom + reserve_mb} MB free), concurrency → {self.limit}")
+        elif headroom > 2 * self.slot_mb and self.limit < self.max_workers:
+            self.limit += 1
+            print(f"🧠 Memory headroom ({headroom + reserve_mb} MB free), concurrency → {self.limit}")
+
+    def acquire(self):
+        with self.condition:
+            if self.sampler is None:
+                self.sampler = RssSampler(self.poll_interval, share=lambda: self.active).start()
+            while not self.can_admit():
+                self.condition.wait(timeout=self.poll_interval)
+                self.measure()
+                self.adjust()
+            self.active += 1
+
+    def release(self):
+        with self.condition:
+            self.measure()
+            self.active -= 1
+            self.adjust()
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+# One governor per process, shared by every sport's ScrapeP6
+governor = MemoryGovernor(max_workers)
+
+def wait_for_headroom(timeout=60, poll_interval=1):
+    """Blocks until at least one slot's worth of memory is free, or the timeout passes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        available = available_mb()
+        if available is None or available - reserve_mb >= default_slot_mb:
+            return True
+        time.sleep(poll_interval)
+    return False
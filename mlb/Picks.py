@@ -1,6 +1,11 @@
 import json
 import os
-from itertools import combinations
+import sys
+
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from parlay_engine import build_leg_table, iter_sorted_parlays, iter_top_entries, iter_flex_entries, default_flex_ladders
+from portfolio import portfolio_entries
 
 # File path for selections.json (located in the "selections" folder under mlb/)
 selections_file_path = os.path.join("mlb/selections", "selections.json")
@@ -9,37 +14,10 @@ selections_file_path = os.path.join("mlb/selections", "selections.json")
 with open(selections_file_path, "r") as file:
     selections = json.load(file)
 
-# Helper function: Convert American odds to decimal odds
-def convert_to_decimal(american_odds):
-    if american_odds < 0:
-        return 1 + (100 / abs(american_odds))
-    else:
-        return 1 + (american_odds / 100)
-
 # Function to normalize minus signs in odds strings
 def normalize_minus_sign(odds_str):
     return odds_str.replace('−', '-').replace('âˆ’', '-').replace('\u00e2\u02c6\u2019', '-')
 
-# Helper function: Calculate parlay odds (in American format) for a list of selection strings
-def calculate_parlay_odds(odds_list):
-    decimal_odds = [convert_to_decimal(int(normalize_minus_sign(selection.split(", ")[2]))) for selection in odds_list]
-    total_decimal = 1
-    for odd in decimal_odds:
-        total_decimal *= odd
-    if total_decimal < 2:
-        parlay_american = -100 / (total_decimal - 1)
-    else:
-        parlay_american = (total_decimal - 1) * 100
-    return round(parlay_american)
-
-# New helper function: Get numeric implied odds as a float (percentage value with 6.98% vig applied)
-def get_implied_odds_value(american_odds):
-    if american_odds > 0:
-        raw_prob = 100 / (american_odds + 100)
-    else:
-        raw_prob = abs(american_odds) / (abs(american_odds) + 100)
-    return (raw_prob / 1.0698) * 100
-
 # Sort the selections by their numeric odds (lowest odds first)
 sorted_selections = sorted(selections, key=lambda x: int(normalize_minus_sign(x.split(", ")[2])))
 
@@ -47,55 +25,48 @@ sorted_selections = sorted(selections, key=lambda x: int(normalize_minus_sign(x.
 # Generate Parlays
 # -----------------------------
 
-# Generate all unique 2-leg parlays using combinations
-all_2_leg = []
-for pair in combinations(sorted_selections, 2):
-    legs = list(pair)
-
-    leg_probs = [get_implied_odds_value(int(normalize_minus_sign(sel.split(", ")[2]))) / 100 for sel in legs]
-    combined_prob = leg_probs[0] * leg_probs[1]
-
-    implied_payout = 3.3
-    vig_payout = 3.0
-
-    implied_edge = ((implied_payout * combined_prob) - 1) * 100
-    vig_edge = ((vig_payout * combined_prob) - 1) * 100
-
-    all_2_leg.append({
-        'parlay': legs,
-        'parlay_odds': f"{calculate_parlay_odds(legs)}",
-        'implied_odds': f"{combined_prob * 100:.2f}%",
-        'vig_odds': f"{combined_prob * 100:.2f}%",
-        'edge': f"{implied_edge:.2f}%",
-        'vig_edge': f"{vig_edge:.2f}%"
-    })
-
-# Generate all unique 3-leg parlays
-all_3_leg = []
-for triplet in combinations(sorted_selections, 3):
-    legs = list(triplet)
-
-    leg_probs = [get_implied_odds_value(int(normalize_minus_sign(sel.split(", ")[2]))) / 100 for sel in legs]
-    combined_prob = leg_probs[0] * leg_probs[1] * leg_probs[2]
-
-    implied_payout = 5.5
-    vig_payout = 5.0
-
-    implied_edge = ((implied_payout * combined_prob) - 1) * 100
-    vig_edge = ((vig_payout * combined_prob) - 1) * 100
-
-    all_3_leg.append({
-        'parlay': legs,
-        'parlay_odds': f"{calculate_parlay_odds(legs)}",
-        'implied_odds': f"{combined_prob * 100:.2f}%",
-        'vig_odds': f"{combined_prob * 100:.2f}%",
-        'edge': f"{implied_edge:.2f}%",
-        'vig_edge': f"{vig_edge:.2f}%"
-    })
-
-# Sort each category by the calculated parlay odds (lowest first)
-sorted_2_leg = sorted(all_2_leg, key=lambda x: int(x['parlay_odds']))
-sorted_3_leg = sorted(all_3_leg, key=lambda x: int(x['parlay_odds']))
+# Pick6 payouts by entry size: (implied payout, vig payout)
+payout_table = {
+    2: (3.3, 3.0),
+    3: (5.5, 5.0),
+    4: (11.0, 10.0),
+    5: (22.0, 20.0),
+    6: (44.0, 40.0),
+}
+
+# Entries of 4+ legs are added on request (PICKS_MAX_LEGS=6 goes up to 6-leg entries)
+max_legs = int(os.getenv("PICKS_MAX_LEGS", "3"))
+larger_entry_counts = {4: 8, 5: 6, 6: 4}
+
+# Flex payout ladders for this sport by entry size: {legs hit: payout multiple}. Sizes not
+# listed use the shared default (parlay_engine.default_flex_ladders).
+# PICKS_RANK_BY=flex_ev ranks 3+ leg entries by expected payout under these instead of all-hit edge
+sport_flex_ladders = {}
+flex_ladders = {**default_flex_ladders, **sport_flex_ladders}
+rank_by = os.getenv("PICKS_RANK_BY", "edge")
+
+# "greedy" walks each ranked list in order; "portfolio" optimizes total edge under the same caps
+selection_mode = os.getenv("PICKS_SELECTION", "greedy")
+
+# Leg odds and probabilities as arrays; every combination is scored in vectorized blocks
+legs = build_leg_table(sorted_selections)
+
+# 2-leg and 3-leg parlays sorted by parlay odds (lowest first), built into dicts only as they're consumed
+sorted_2_leg = iter_sorted_parlays(legs, 2, *payout_table[2])
+sorted_3_leg = iter_sorted_parlays(legs, 3, *payout_table[3])
+
+# Incremental mode (PICKS_INCREMENTAL=1, window enumeration only): keep the 2/3-leg rankings between runs and only rescore entries on changed lines
+if os.getenv("PICKS_INCREMENTAL") == "1":
+    from incremental import incremental_parlays
+    sorted_2_leg, sorted_3_leg = incremental_parlays(legs, "mlb/picks_state.json", payout_table)
+
+def ranked_entries(leg_count):
+    """Entries of 3+ legs, best first: by flex EV when requested, otherwise by all-hit odds/probability."""
+    if rank_by == "flex_ev" and leg_count in flex_ladders:
+        return iter_flex_entries(legs, leg_count, *payout_table[leg_count], flex_ladders[leg_count])
+    if leg_count == 3:
+        return sorted_3_leg
+    return iter_top_entries(legs, leg_count, *payout_table[leg_count])
 
 # -----------------------------
 # Selection Functions with Usage Constraints
@@ -150,11 +121,34 @@ def select_3_leg_parlays(sorted_parlays, max_individual, max_pair, desired_numbe
 # Select Top Parlays with Constraints
 # -----------------------------
 
-top_10_2_leg = select_parlays(sorted_2_leg, max_individual=3, desired_number=15)
-top_5_3_leg = select_3_leg_parlays(sorted_3_leg, max_individual=3, max_pair=2, desired_number=12)
+if selection_mode == "portfolio":
+    top_10_2_leg = portfolio_entries(legs, 2, *payout_table[2], desired_number=15, max_individual=3)
+    top_5_3_leg = portfolio_entries(legs, 3, *payout_table[3], desired_number=12, max_individual=3, max_pair=2)
+else:
+    top_10_2_leg = select_parlays(sorted_2_leg, max_individual=3, desired_number=15)
+    top_5_3_leg = select_3_leg_parlays(ranked_entries(3), max_individual=3, max_pair=2, desired_number=12)
+
+# 4- to 6-leg entries from the branch-and-bound search, ranked by edge, with the same usage and pair limits
+larger_entries = []
+for leg_count in range(4, max_legs + 1):
+    if selection_mode == "portfolio":
+        larger_entries += portfolio_entries(
+            legs, leg_count, *payout_table[leg_count],
+            desired_number=larger_entry_counts[leg_count], max_individual=3, max_pair=2
+        )
+        continue
+    larger_entries += select_3_leg_parlays(
+        ranked_entries(leg_count),
+        max_individual=3, max_pair=2, desired_number=larger_entry_counts[leg_count]
+    )
 
 # Combine the chosen parlays
-final_parlays = top_10_2_leg + top_5_3_leg
+final_parlays = top_10_2_leg + top_5_3_leg + larger_entries
+
+# Optional correlated Monte Carlo check of the chosen entries against Pick6 payouts (PICKS_SIMULATE=1)
+if os.getenv("PICKS_SIMULATE") == "1":
+    from simulator import annotate_entries
+    annotate_entries(legs, final_parlays, {size: payouts[1] for size, payouts in payout_table.items()})
 
 # -----------------------------
 # Save to picks.json
@@ -166,3 +160,9 @@ with open(output_file_path, "w") as file:
     json.dump(locks, file, indent=4)
 
 print(f"Top 15 two-leg parlays and top 10 three-leg parlays have been saved to {output_file_path}")
+
+# Sweep mode: every profile in the PICKS_PROFILES file is evaluated against one shared enumeration
+profiles_file = os.getenv("PICKS_PROFILES")
+if profiles_file:
+    from profile_sweep import run_sweep
+    run_sweep(legs, profiles_file, output_prefix="mlb/")
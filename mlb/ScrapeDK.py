@@ -1,8 +1,13 @@
 import os
+import sys
 import json
 import requests
 import time
 
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from freshness import mark_fresh, mark_failed
+
 # Define URLs for MLB stat types
 urls = {
     "hits_runs_rbis": "https://sportsbook-nash.draftkings.com/api/sportscontent/dkusnc/v1/leagues/84240/categories/743/subcategories/17406",
@@ -29,6 +34,9 @@ headers = {
     'Sec-Fetch-Site': 'same-origin',
 }
 
+# One keep-alive session, so repeated fetches (and daemon refreshes) reuse connections
+session = requests.Session()
+
 # Ensure the 'mlb/data' folder exists
 os.makedirs('mlb/data', exist_ok=True)
 
@@ -37,9 +45,10 @@ def fetch_and_save_json(url, filename):
     Ultra-lightweight function to fetch JSON from DraftKings MLB API using requests.
     This approach uses ~99% less CPU and memory compared to Selenium!
     """
+    path = f"mlb/data/{filename}"
     try:
         start_time = time.time()
-        response = requests.get(url, headers=headers, timeout=15)
+        response = session.get(url, headers=headers, timeout=15)
         end_time = time.time()
         
         if response.status_code == 200:
@@ -47,26 +56,32 @@ def fetch_and_save_json(url, filename):
             parsed_data = response.json()
             
             # Save JSON file inside the 'mlb/data' folder
-            with open(f"mlb/data/{filename}", "w", encoding="utf-8") as file:
+            with open(path, "w", encoding="utf-8") as file:
                 json.dump(parsed_data, file, ensure_ascii=False, indent=4)
+            mark_fresh(path)
             
             print(f"✅ {filename}: {len(response.text)} bytes in {end_time - start_time:.2f}s")
             return True
         else:
             print(f"❌ {filename}: HTTP {response.status_code} - {response.text[:100]}")
+            mark_failed(path, f"HTTP {response.status_code}")
             return False
             
     except requests.exceptions.Timeout:
         print(f"❌ {filename}: Request timed out")
+        mark_failed(path, "request timed out")
         return False
     except requests.exceptions.RequestException as e:
         print(f"❌ {filename}: Request failed - {e}")
+        mark_failed(path, e)
         return False
     except json.JSONDecodeError as e:
         print(f"❌ {filename}: Invalid JSON response - {e}")
+        mark_failed(path, e)
         return False
     except Exception as e:
         print(f"❌ {filename}: Unexpected error - {e}")
+        mark_failed(path, e)
         return False
 
 def main():
@@ -1,8 +1,13 @@
 import json
 import os
+import sys
 from datetime import datetime
 import pytz
 
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from freshness import load_json
+
 # Function to normalize the minus sign to a regular hyphen
 def normalize_minus_sign(odds):
     return odds.replace('−', '-').replace('âˆ’', '-').replace('\u00e2\u02c6\u2019', '-')
@@ -32,16 +37,13 @@ def process_category(category_name):
     lines_file = f'mlb/lines/{category_name}_lines.json'
     options_file = f'mlb/options/{category_name}_options.json'
     
-    if not os.path.exists(lines_file) or not os.path.exists(options_file):
+    # Stale copies are used within the staleness budget; beyond it the stat is skipped
+    lines_data = load_json(lines_file)
+    options_data = load_json(options_file)
+    if lines_data is None or options_data is None:
         print(f"Skipping {category_name}: Missing data file.")
         return []
     
-    with open(lines_file, 'r') as file:
-        lines_data = json.load(file)
-    
-    with open(options_file, 'r') as file:
-        options_data = json.load(file)
-    
     selections = []
     
     for player in lines_data:
@@ -81,22 +83,28 @@ mlb_stat_types = [
     'outs'
 ]
 
-all_selections = []
-for category in mlb_stat_types:
-    try:
-        selections = process_category(category)
-        all_selections.extend(selections)
-    except Exception as e:
-        print(f"Error processing category '{category}': {e}")
+def save_selections(all_selections):
+    # Sort all selections by odds
+    all_selections.sort(key=lambda x: int(normalize_minus_sign(x.split(", ")[2])))
+
+    # Ensure the 'mlb/selections' folder exists
+    os.makedirs('mlb/selections', exist_ok=True)
 
-# Sort all selections by odds
-all_selections.sort(key=lambda x: int(normalize_minus_sign(x.split(", ")[2])))
+    # Write selections to a JSON file
+    with open('mlb/selections/selections.json', 'w') as file:
+        json.dump(all_selections, file, indent=4)
 
-# Ensure the 'mlb/selections' folder exists
-os.makedirs('mlb/selections', exist_ok=True)
+    print("All MLB selections written to mlb/selections/selections.json.")
 
-# Write selections to a JSON file
-with open('mlb/selections/selections.json', 'w') as file:
-    json.dump(all_selections, file, indent=4)
+def main():
+    all_selections = []
+    for category in mlb_stat_types:
+        try:
+            selections = process_category(category)
+            all_selections.extend(selections)
+        except Exception as e:
+            print(f"Error processing category '{category}': {e}")
+    save_selections(all_selections)
 
-print("All MLB selections written to mlb/selections/selections.json.")
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 import json
 import os
+import sys
+
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from freshness import load_json, derive
 
 def extract_stat_with_american_odds(input_file, output_file):
     """
@@ -13,9 +18,11 @@ def extract_stat_with_american_odds(input_file, output_file):
     The American odds string is cleaned so that any Unicode minus sign (‐)
     is replaced with a normal hyphen ("-").
     """
-    # Load the JSON data
-    with open(input_file, 'r') as f:
-        data = json.load(f)
+    # Load the JSON data; without a usable copy, last run's lines are left as they are
+    data = load_json(input_file)
+    if data is None:
+        print(f"Skipping '{input_file}': no usable DraftKings data")
+        return
     
     # Build a mapping from event id to its details (matchup and game time)
     event_mapping = {}
@@ -98,6 +105,7 @@ def extract_stat_with_american_odds(input_file, output_file):
     # Write the output file inside the 'nhl/lines' folder.
     with open(f'nhl/lines/{output_file}', 'w') as f:
         json.dump(output_list, f, indent=2, ensure_ascii=False)
+    derive(f'nhl/lines/{output_file}', input_file)
     
     print(f"Extracted data for {len(output_list)} players from '{input_file}' to 'nhl/lines/{output_file}'.")
 
@@ -111,8 +119,14 @@ nhl_stat_types = [
     "saves"
 ]
 
-# Automatically run the extraction for each NHL stat file when this module is imported.
-for stat in nhl_stat_types:
-    input_filename = f"nhl/data/{stat}.json"
-    output_filename = f"{stat}_lines.json"
-    extract_stat_with_american_odds(input_filename, output_filename)
+def extract_stat(stat):
+    """Extracts one NHL stat's DraftKings data into its lines file."""
+    extract_stat_with_american_odds(f"nhl/data/{stat}.json", f"{stat}_lines.json")
+
+def main():
+    # Run the extraction for each NHL stat file
+    for stat in nhl_stat_types:
+        extract_stat(stat)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import json
 import os
+import sys
 from datetime import datetime
 import pytz
 
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from freshness import load_json
+
 # Function to normalize the minus sign to a regular hyphen
 def normalize_minus_sign(odds):
     return odds.replace('−', '-').replace('âˆ’', '-').replace('\u00e2\u02c6\u2019', '-')
@@ -31,16 +36,13 @@ def process_category(category_name):
     lines_file = f'nhl/lines/{category_name}_lines.json'
     options_file = f'nhl/options/{category_name}_options.json'
     
-    if not os.path.exists(lines_file) or not os.path.exists(options_file):
+    # Stale copies are used within the staleness budget; beyond it the stat is skipped
+    lines_data = load_json(lines_file)
+    options_data = load_json(options_file)
+    if lines_data is None or options_data is None:
         print(f"Skipping {category_name}: Missing data file.")
         return []
     
-    with open(lines_file, 'r') as file:
-        lines_data = json.load(file)
-    
-    with open(options_file, 'r') as file:
-        options_data = json.load(file)
-    
     selections = []
     
     for player in lines_data:
@@ -73,18 +75,24 @@ def process_category(category_name):
 # NHL stat categories to process
 nhl_stat_types = ['shots_on_goal', 'points', 'assists', 'blocks', 'saves']
 
-all_selections = []
-for category in nhl_stat_types:
-    try:
-        selections = process_category(category)
-        all_selections.extend(selections)
-    except Exception as e:
-        print(f"Error processing category '{category}': {e}")
+def save_selections(all_selections):
+    all_selections.sort(key=lambda x: int(normalize_minus_sign(x.split(", ")[2])))
+
+    os.makedirs('nhl/selections', exist_ok=True)
+    with open('nhl/selections/selections.json', 'w') as file:
+        json.dump(all_selections, file, indent=4)
 
-all_selections.sort(key=lambda x: int(normalize_minus_sign(x.split(", ")[2])))
+    print("All NHL selections written to nhl/selections/selections.json.")
 
-os.makedirs('nhl/selections', exist_ok=True)
-with open('nhl/selections/selections.json', 'w') as file:
-    json.dump(all_selections, file, indent=4)
+def main():
+    all_selections = []
+    for category in nhl_stat_types:
+        try:
+            selections = process_category(category)
+            all_selections.extend(selections)
+        except Exception as e:
+            print(f"Error processing category '{category}': {e}")
+    save_selections(all_selections)
 
-print("All NHL selections written to nhl/selections/selections.json.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import os
+import re
+import sys
+import json
+import gzip
+import glob
+import time
+import asyncio
+import argparse
+import threading
+import statistics
+import tracemalloc
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from snapshot_store import list_snapshots, load_snapshot
+
+# Offline corpus of saved Pick6 pages with their expected options and locked lists
+corpus_dir = "p6_corpus"
+sports = {"nba": "", "wnba": "wnba/", "mlb": "mlb/", "nhl": "nhl/"}
+
+# Same extraction rules as ScrapeP6
+player_regex = re.compile(r"^Pick\s+(.*?)\s+for\s+Less than", re.IGNORECASE)
+
+def normalize_to_initial_format(full_name):
+    parts = full_name.strip().split()
+    if len(parts) >= 2:
+        return f"{parts[0][0]}. {' '.join(parts[1:])}"
+    return full_name
+
+def finish(valid_players, locked_players):
+    """Applies ScrapeP6's post-processing to raw names: drops Contest Fill and locked players."""
+    valid = {name for name in valid_players if name != "Contest Fill"}
+    options = sorted(name for name in valid if normalize_to_initial_format(name) not in locked_players)
+    return options, sorted(locked_players)
+
+def names_from_labels(labels):
+    names = set()
+    for label in labels:
+        match = player_regex.search(label or "")
+        if match:
+            names.add(match.group(1).strip())
+    return names
+
+# -----------------------------
+# Extraction strategies
+# -----------------------------
+
+def extract_with_bs4(html, parser):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, parser)
+    locked = set()
+    for card in soup.select('[data-testid="playerStatCard"]'):
+        name_tag = card.select_one('[data-testid="player-name"]')
+        if name_tag and card.find("use", {"href": "#lock-icon"}):
+            locked.add(name_tag.get_text(strip=True))
+    labels = [btn.get("aria-label") for btn in soup.select('button[aria-label*="for Less than"]')]
+    return finish(names_from_labels(labels), locked)
+
+def extract_with_selectolax(html):
+    from selectolax.parser import HTMLParser
+    tree = HTMLParser(html)
+    locked = set()
+    for card in tree.css('[data-testid="playerStatCard"]'):
+        name_tag = card.css_first('[data-testid="player-name"]')
+        if name_tag and card.css_first('use[href="#lock-icon"]'):
+            locked.add(name_tag.text(strip=True))
+    labels = [btn.attributes.get("aria-label") for btn in tree.css('button[aria-label*="for Less than"]')]
+    return finish(names_from_labels(labels), locked)
+
+def python_strategies():
+    """Returns the available in-process strategies; parsers that aren't installed are skipped."""
+    strategies = {"bs4_html.parser": lambda html: extract_with_bs4(html, "html.parser")}
+    try:
+        import lxml  # noqa: F401
+        strategies["bs4_lxml"] = lambda html: extract_with_bs4(html, "lxml")
+    except ImportError:
+        print("ℹ️ lxml not installed, skipping bs4_lxml")
+    try:
+        import html5lib  # noqa: F401
+        strategies["bs4_html5lib"] = lambda html: extract_with_bs4(html, "html5lib")
+    except ImportError:
+        print("ℹ️ html5lib not installed, skipping bs4_html5lib")
+    try:
+        import selectolax  # noqa: F401
+        strategies["selectolax"] = extract_with_selectolax
+    except ImportError:
+        print("ℹ️ selectolax not installed, skipping selectolax")
+    return strategies
+
+js_extract = """
+    () => {
+        const locked = [];
+        document.querySelectorAll('[data-testid="playerStatCard"]').forEach(card => {
+            const name = card.querySelector('[data-testid="player-name"]');
+            if (name && card.querySelector('use[href="#lock-icon"]')) locked.push(name.textContent.trim());
+        });
+        const labels = Array.from(document.querySelectorAll('button[aria-label*="for Less than"]'))
+            .map(btn => btn.getAttribute('aria-label'));
+        return {locked, labels};
+    }
+"""
+
+class CorpusHandler(BaseHTTPRequestHandler):
+    pages = {}
+
+    def do_GET(self):
+        html = self.pages.get(self.path.lstrip("/"))
+        if html is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+async def run_js_strategy(corpus, repeats):
+    """
+    Serves each saved page from localhost and extracts in-page with the same selectors
+    ScrapeP6 uses. Site scripts are blocked so only the saved DOM is measured.
+    """
+    from playwright.async_api import async_playwright
+    from memory_governor import RssSampler
+
+    CorpusHandler.pages = {entry["id"]: entry["html"] for entry in corpus}
+    server = HTTPServer(("127.0.0.1", 0), CorpusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/"
+
+    results = []
+    try:
+        async with async_playwright() as p, RssSampler() as sampler:
+            browser = await p.webkit.launch(headless=True)
+            context = await browser.new_context(java_script_enabled=False)
+            page = await context.new_page()
+
+            async def local_only(route):
+                if route.request.url.startswith(base_url):
+                    await route.continue_()
+                else:
+                    await route.abort()
+            await page.route("**/*", local_only)
+
+            for entry in corpus:
+                timings = []
+                output = None
+                sampler.reset()
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    await page.goto(base_url + entry["id"], wait_until="domcontentloaded")
+                    data = await page.evaluate(js_extract)
+                    output = finish(names_from_labels(data["labels"]), set(data["locked"]))
+                    timings.append(time.perf_counter() - start)
+                # Peak browser RSS sampled while this page loaded and extracted
+                results.append((entry, output, timings, max(sampler.peak_mb, sampler.read()) * 1024 * 1024))
+            await browser.close()
+    finally:
+        server.shutdown()
+    return results
+
+def run_python_strategy(extract, corpus, repeats):
+    results = []
+    for entry in corpus:
+        timings = []
+        output = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            output = extract(entry["html"])
+            timings.append(time.perf_counter() - start)
+        # Measure peak allocation on a separate pass so tracing doesn't skew latency
+        tracemalloc.start()
+        extract(entry["html"])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append((entry, output, timings, peak))
+    return results
+
+# -----------------------------
+# Corpus
+# -----------------------------
+
+def build_corpus():
+    """
+    Collects saved Pick6 pages into the corpus. Snapshots carry the options and
+    locked lists the live scrape produced; legacy data_p6/<stat>_p6.json captures
+    get their expected lists from the reference html.parser extraction.
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    added = 0
+    for sport, prefix in sports.items():
+        for path in list_snapshots(f"{prefix}data_p6/snapshots"):
+            snapshot = load_snapshot(path)
+            if "options" not in snapshot:
+                continue
+            entry_id = f"{sport}_{os.path.basename(path).replace('.json.gz', '')}"
+            added += save_corpus_entry(entry_id, sport, snapshot["stat"], snapshot["html"],
+                                       snapshot["options"], snapshot["locked"], "live")
+
+        for path in glob.glob(f"{prefix}data_p6/*_p6.json"):
+            with open(path, "r", encoding="utf-8") as f:
+                html = json.load(f).get("html", "")
+            stat = os.path.basename(path).replace("_p6.json", "")
+            options, locked = extract_with_bs4(html, "html.parser")
+            if not options and not locked:
+                continue
+            entry_id = f"{sport}_{int(os.path.getmtime(path))}_{stat}_legacy"
+            added += save_corpus_entry(entry_id, sport, stat, html, options, locked, "reference")
+
+    print(f"📚 Added {added} pages to '{corpus_dir}/' ({len(load_corpus())} total)")
+
+def save_corpus_entry(entry_id, sport, stat, html, options, locked, expected_source):
+    path = os.path.join(corpus_dir, f"{entry_id}.json.gz")
+    if os.path.exists(path):
+        return 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({
+            "id": entry_id,
+            "sport": sport,
+            "stat": stat,
+            "html": html,
+            "expected": {"options": options, "locked": locked},
+            "expected_source": expected_source,
+        }, f)
+    return 1
+
+def load_corpus():
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.json.gz"))):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            corpus.append(json.load(f))
+    return corpus
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def summarize(name, results):
+    correct = sum(
+        1 for entry, output, _, _ in results
+        if output == (entry["expected"]["options"], entry["expected"]["locked"])
+    )
+    timings = [t for _, _, entry_timings, _ in results for t in entry_timings]
+    return {
+        "strategy": name,
+        "correct": correct,
+        "pages": len(results),
+        "median_ms": statistics.median(timings) * 1000,
+        "p95_ms": sorted(timings)[int(0.95 * (len(timings) - 1))] * 1000,
+        "peak_mb": max(peak for _, _, _, peak in results) / (1024 * 1024),
+        "mismatches": [entry["id"] for entry, output, _, _ in results
+                       if output != (entry["expected"]["options"], entry["expected"]["locked"])],
+    }
+
+def run_benchmark(repeats, include_js, output_file=None):
+    corpus = load_corpus()
+    if not corpus:
+        print(f"❌ No pages in '{corpus_dir}/'. Run 'python p6_benchmark.py build' first.")
+        return []
+
+    print(f"⏱️ Benchmarking {len(corpus)} pages × {repeats} runs")
+    summaries = []
+    for name, extract in python_strategies().items():
+        summaries.append(summarize(name, run_python_strategy(extract, corpus, repeats)))
+    if include_js:
+        try:
+            summaries.append(summarize("playwright_js", asyncio.run(run_js_strategy(corpus, repeats))))
+        except Exception as e:
+            print(f"⚠️ playwright_js skipped - {e}")
+
+    print(f"\n{'strategy':<18}{'correct':>10}{'median ms':>12}{'p95 ms':>10}{'peak MB':>10}")
+    for s in summaries:
+        print(f"{s['strategy']:<18}{s['correct']:>5}/{s['pages']:<4}{s['median_ms']:>12.2f}{s['p95_ms']:>10.2f}{s['peak_mb']:>10.1f}")
+        if s["mismatches"]:
+            print(f"   ❌ mismatches: {', '.join(s['mismatches'][:5])}")
+
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump(summaries, f, indent=4)
+    return summaries
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Pick6 parser corpus and extraction benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="add saved Pick6 pages to the corpus")
+    bench = subparsers.add_parser("run", help="time every extraction strategy over the corpus")
+    bench.add_argument("--repeats", type=int, default=5)
+    bench.add_argument("--no-js", action="store_true", help="skip the Playwright in-page strategy")
+    bench.add_argument("--output", help="also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_corpus()
+    else:
+        summaries = run_benchmark(args.repeats, not args.no_js, args.output)
+        if any(s["mismatches"] for s in summaries):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,646 @@
+import os
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left
+from math import comb
+import numpy as np
+
+# Rows per enumeration block; keeps temporary arrays small on the Pi
+block_size = 1 << 18
+
+# First window of best parlays kept while streaming; grows 4x only if selection needs more
+initial_window = 1024
+
+# "best_first" walks parlays lazily in odds order; "window" streams bounded top-K windows
+enumeration_mode = os.getenv("PICKS_ENUMERATION", "best_first")
+
+# Processes that share a window-mode scan, split by first leg (1 keeps it in-process)
+workers = int(os.getenv("PICKS_WORKERS", "1"))
+
+# Same vig factor Picks.py applies to implied probabilities
+vig_factor = 1.0698
+
+# Legs that can't share an entry: "player" (same player), "related" (same player on
+# overlapping stats, e.g. points and pra) and "game" (same game). Comma-separated; "none" disables.
+conflict_rules = [rule for rule in os.getenv("PICKS_CONFLICTS", "none").split(",") if rule and rule != "none"]
+
+# What each stat is built from; two stats are related when their components overlap
+stat_components = {
+    # NBA / WNBA
+    "points": {"points"},
+    "rebounds": {"rebounds"},
+    "assists": {"assists"},
+    "threes": {"threes", "points"},
+    "pa": {"points", "assists"},
+    "pr": {"points", "rebounds"},
+    "pra": {"points", "rebounds", "assists"},
+    "ar": {"assists", "rebounds"},
+    "steals": {"steals"},
+    "blocks": {"blocks"},
+    "sb": {"steals", "blocks"},
+    "turnovers": {"turnovers"},
+    # MLB
+    "hits_runs_rbis": {"hits", "runs", "rbis"},
+    "singles": {"hits"},
+    "tbs": {"hits"},
+    "walks": {"walks"},
+    "sos": {"strikeouts", "outs"},
+    "outs": {"outs"},
+    "era": {"runs_allowed"},
+    "hits_allowed": {"hits_allowed", "runs_allowed"},
+    "walks_allowed": {"walks_allowed", "runs_allowed"},
+    # NHL
+    "shots_on_goal": {"shots"},
+    "saves": {"saves"},
+}
+
+def normalize_minus_sign(odds_str):
+    return odds_str.replace('−', '-').replace('âˆ’', '-').replace('\u00e2\u02c6\u2019', '-')
+
+def selection_odds(selection):
+    return int(normalize_minus_sign(selection.split(", ")[2]))
+
+# -----------------------------
+# Leg table
+# -----------------------------
+
+def build_leg_table(selections, rules=None):
+    """
+    Converts selection strings into arrays indexed by leg id:
+    American odds, decimal odds and vig-adjusted implied probability.
+    Uses the same float operations as the scalar helpers so results match exactly.
+    Also attaches the conflict structures for the given rules (see build_conflicts()).
+    """
+    american = np.array([selection_odds(sel) for sel in selections], dtype=np.int64)
+    magnitude = np.abs(american).astype(np.float64)
+    decimal = np.where(american < 0, 1 + (100 / magnitude), 1 + (american / 100))
+    raw_prob = np.where(american > 0, 100 / (american + 100), magnitude / (magnitude + 100))
+    prob = ((raw_prob / vig_factor) * 100) / 100
+    legs = {
+        "selections": list(selections),
+        "american": american,
+        "decimal": decimal,
+        "prob": prob,
+    }
+    legs["conflicts"], legs["conflict_matrix"] = build_conflicts(legs["selections"], conflict_rules if rules is None else rules)
+    return legs
+
+def stat_key(selection):
+    """"Colt Keith, over 1.5 Hits_runs_rbis, ..." -> "hits_runs_rbis"."""
+    return selection.split(", ")[1].split()[-1].lower()
+
+def build_conflicts(selections, rules):
+    """
+    Precomputes which legs can't share an entry, once per slate. Returns a bitset per
+    leg (a Python int with bit j set when leg j conflicts) for the branch-pruning
+    searches, and the same relation as an (n, n) bool matrix for filtering blocks.
+    """
+    n = len(selections)
+    fields = [selection.split(", ") for selection in selections]
+    players = np.array([parts[0] for parts in fields], dtype=object)
+    games = np.array([parts[3] if len(parts) > 3 else "" for parts in fields], dtype=object)
+    matrix = np.zeros((n, n), dtype=bool)
+    same_player = players[:, None] == players[None, :]
+    if "player" in rules:
+        matrix |= same_player
+    if "related" in rules:
+        components = [stat_components.get(stat_key(sel), {stat_key(sel)}) for sel in selections]
+        overlap = np.array([[bool(a & b) for b in components] for a in components], dtype=bool).reshape(n, n)
+        matrix |= same_player & overlap
+    if "game" in rules:
+        matrix |= games[:, None] == games[None, :]
+    np.fill_diagonal(matrix, False)
+
+    conflicts = []
+    for row in matrix:
+        bits = 0
+        for j in np.flatnonzero(row).tolist():
+            bits |= 1 << j
+        conflicts.append(bits)
+    return conflicts, matrix
+
+def has_conflict(legs, combo):
+    conflicts = legs["conflicts"]
+    taken = 0
+    for i in combo:
+        if conflicts[i] & taken:
+            return True
+        taken |= 1 << i
+    return False
+
+def conflict_free(legs, combos):
+    """Boolean mask of the rows of a combination block with no conflicting pair."""
+    matrix = legs["conflict_matrix"]
+    keep = np.ones(len(combos), dtype=bool)
+    if not matrix.any():
+        return keep
+    for a in range(combos.shape[1]):
+        for b in range(a + 1, combos.shape[1]):
+            keep &= ~matrix[combos[:, a], combos[:, b]]
+    return keep
+
+def american_from_decimal(total_decimal):
+    """Vectorized parlay odds in American format, rounded like Python's round()."""
+    with np.errstate(divide="ignore"):
+        american = np.where(total_decimal < 2, -100 / (total_decimal - 1), (total_decimal - 1) * 100)
+    return np.round(american).astype(np.int64)
+
+# -----------------------------
+# Vectorized enumeration
+# -----------------------------
+
+def combinations_array(n, k):
+    """All k-leg combinations of n legs as an (m, k) array, in itertools.combinations order."""
+    if k > n:
+        return np.empty((0, k), dtype=np.int32)
+    if k == 1:
+        return np.arange(n, dtype=np.int32).reshape(-1, 1)
+    if k == 2:
+        # Row-major upper triangle is exactly combinations order
+        rows, cols = np.triu_indices(n, 1)
+        return np.column_stack([rows, cols]).astype(np.int32)
+    blocks = []
+    for first in range(n - k + 1):
+        tail = combinations_array(n - first - 1, k - 1) + (first + 1)
+        head = np.full((len(tail), 1), first, dtype=np.int32)
+        blocks.append(np.hstack([head, tail]))
+    return np.vstack(blocks)
+
+def combination_chunks(n, k, start=0, prefix=(), max_rows=None, conflicts=None):
+    """
+    Yields every k-leg combination of legs start..n-1 in itertools.combinations order,
+    as (m, len(prefix) + k) arrays of at most max_rows rows. Large groups are split on
+    their next leg, so peak memory doesn't grow with the slate. With per-leg conflict
+    bitsets, a split prefix that already conflicts is skipped along with its whole group.
+    """
+    max_rows = max_rows or block_size
+    if k == 1:
+        if start < n:
+            singles = np.arange(start, n, dtype=np.int32).reshape(-1, 1)
+            yield np.hstack([np.tile(np.array(prefix, dtype=np.int32), (len(singles), 1)), singles])
+        return
+    for first in range(start, n - k + 1):
+        if conflicts and any(conflicts[first] >> i & 1 for i in prefix):
+            continue
+        head = prefix + (first,)
+        if k > 2 and comb(n - first - 1, k - 1) > max_rows:
+            yield from combination_chunks(n, k - 1, first + 1, head, max_rows, conflicts)
+            continue
+        tail = combinations_array(n - first - 1, k - 1) + (first + 1)
+        yield np.hstack([np.tile(np.array(head, dtype=np.int32), (len(tail), 1)), tail])
+
+def score_combos(legs, combos):
+    """
+    Computes parlay odds for a block of combinations with broadcasting.
+    Decimal odds are multiplied in leg order, matching calculate_parlay_odds().
+    """
+    total_decimal = legs["decimal"][combos[:, 0]]
+    for position in range(1, combos.shape[1]):
+        total_decimal = total_decimal * legs["decimal"][combos[:, position]]
+    return american_from_decimal(total_decimal)
+
+def first_leg_chunks(n, k, first, conflicts=None):
+    """Every k-leg combination starting with leg `first`, as blocks in combinations order."""
+    if k == 1:
+        yield np.array([[first]], dtype=np.int32)
+        return
+    yield from combination_chunks(n, k - 1, first + 1, (first,), conflicts=conflicts)
+
+def scan_top_parlays(legs, k, limit, first_legs=None):
+    """
+    Streams every conflict-free k-leg parlay (optionally only those starting with one
+    of `first_legs`) and keeps only the `limit` best by (parlay odds, combinations
+    order), which is exactly the head of the full stably sorted list. Returns
+    (combos, parlay_odds, ranks) with memory bounded by limit + one block; ranks
+    increase in combinations order across all first legs, so shards merge exactly.
+    """
+    n = len(legs["decimal"])
+    total = comb(n, k)
+    best_combos = np.empty((0, k), dtype=np.int32)
+    best_odds = np.empty(0, dtype=np.int64)
+    best_rank = np.empty(0, dtype=np.int64)
+    for first in (range(n - k + 1) if first_legs is None else first_legs):
+        # Combinations starting at `first` or later number C(n - first, k)
+        offset = total - comb(n - first, k)
+        for combos in first_leg_chunks(n, k, first, legs["conflicts"]):
+            ranks = np.arange(offset, offset + len(combos), dtype=np.int64)
+            offset += len(combos)
+            keep = conflict_free(legs, combos)
+            if not keep.all():
+                combos, ranks = combos[keep], ranks[keep]
+            odds = score_combos(legs, combos)
+            if len(best_odds) >= limit:
+                # Later combinations lose ties, so only strictly lower odds can enter
+                keep = odds < best_odds[-1]
+                if not keep.any():
+                    continue
+                combos, odds, ranks = combos[keep], odds[keep], ranks[keep]
+            best_combos = np.vstack([best_combos, combos])
+            best_odds = np.concatenate([best_odds, odds])
+            best_rank = np.concatenate([best_rank, ranks])
+            order = np.lexsort((best_rank, best_odds))[:limit]
+            best_combos, best_odds, best_rank = best_combos[order], best_odds[order], best_rank[order]
+    return best_combos, best_odds, best_rank
+
+# -----------------------------
+# Sharded enumeration
+# -----------------------------
+
+# Leg arrays each worker process receives once, at startup
+shared_legs = None
+worker_pool = None
+pool_legs = None
+
+def init_worker(leg_arrays):
+    global shared_legs
+    shared_legs = leg_arrays
+
+def scan_shard(k, limit, first_legs):
+    return scan_top_parlays(shared_legs, k, limit, first_legs)
+
+def get_worker_pool(legs):
+    """
+    One pool per Picks run, forked with the read-only leg arrays already in place, so
+    tasks carry only (k, limit, first legs). Returns None where fork isn't available
+    (the Picks scripts have no __main__ guard to survive a spawned re-import).
+    """
+    global worker_pool, pool_legs
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    if worker_pool is None or pool_legs is not legs:
+        if worker_pool is not None:
+            worker_pool.shutdown()
+        leg_arrays = {key: legs[key] for key in ("decimal", "conflicts", "conflict_matrix")}
+        worker_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=init_worker,
+            initargs=(leg_arrays,),
+        )
+        pool_legs = legs
+    return worker_pool
+
+def top_parlays(legs, k, limit):
+    """
+    The `limit` best k-leg parlays as (combos, parlay_odds). With PICKS_WORKERS > 1 the
+    first legs are dealt round-robin into shards (early first legs own the most
+    combinations), each worker keeps a local top `limit`, and the shards are merged
+    on (parlay odds, combinations rank), giving the same result as one process.
+    """
+    n = len(legs["decimal"])
+    pool = get_worker_pool(legs) if workers > 1 and k > 1 else None
+    if pool is None:
+        combos, parlay_odds, _ = scan_top_parlays(legs, k, limit)
+        return combos, parlay_odds
+
+    firsts = list(range(n - k + 1))
+    shard_count = min(len(firsts), workers * 4) or 1
+    shards = [firsts[i::shard_count] for i in range(shard_count)]
+    results = list(pool.map(scan_shard, [k] * shard_count, [limit] * shard_count, shards))
+    combos = np.vstack([np.empty((0, k), dtype=np.int32)] + [r[0] for r in results])
+    parlay_odds = np.concatenate([np.empty(0, dtype=np.int64)] + [r[1] for r in results])
+    ranks = np.concatenate([np.empty(0, dtype=np.int64)] + [r[2] for r in results])
+    order = np.lexsort((ranks, parlay_odds))[:limit]
+    return combos[order], parlay_odds[order]
+
+def parlay_odds_of(legs, combo):
+    """Scalar parlay odds for one combination, bit-identical to score_combos()."""
+    decimal = legs["decimal"]
+    total_decimal = float(decimal[combo[0]])
+    for i in combo[1:]:
+        total_decimal *= float(decimal[i])
+    if total_decimal < 2:
+        return round(-100 / (total_decimal - 1))
+    return round((total_decimal - 1) * 100)
+
+def allowed_after(allowed, after, count):
+    """The first `count` legs after `after` whose bit is set in `allowed`, in order."""
+    found = []
+    rest = allowed >> (after + 1)
+    leg = after + 1
+    while rest and len(found) < count:
+        skip = (rest & -rest).bit_length() - 1
+        leg += skip
+        found.append(leg)
+        rest >>= skip + 1
+        leg += 1
+    return found
+
+def conflict_free_frontier(legs, k, score):
+    """
+    Lazily yields (combo, key) for every conflict-free k-leg combination in exact
+    ascending (key, combinations order), for a `score` (a list of combos -> their keys)
+    that never falls when any leg moves to a later one. The frontier holds two kinds
+    of state, each keyed by a combo that every entry under it is at or after in every
+    position, so states pop in order:
+    - a candidate: a prefix plus one next leg, keyed by that leg followed by the
+      earliest legs still allowed next to everything picked;
+    - the rest of the candidates after some leg, keyed by the earliest legs allowed
+      next to the prefix alone. Popping it splits off its first candidate.
+    Candidates and completions are drawn from the prefix's conflict bitset, so
+    conflicting legs are skipped when children are pushed and a candidate that can't
+    be finished is never pushed at all. The bounds hold for any conflict rule, not
+    only transitive ones like "player".
+    """
+    conflicts = legs["conflicts"]
+    n = len(legs["selections"])
+    if k > n or k <= 0:
+        return
+
+    def candidate(prefix, allowed, leg):
+        remaining = k - len(prefix) - 1
+        completion = allowed_after(allowed & ~conflicts[leg], leg, remaining)
+        if len(completion) < remaining:
+            return None
+        return prefix + (leg,) + tuple(completion), 0, prefix, leg, allowed
+
+    def candidates_after(prefix, allowed, after):
+        earliest = allowed_after(allowed, after, k - len(prefix))
+        if len(earliest) < k - len(prefix):
+            return None
+        return prefix + tuple(earliest), 1, prefix, after, allowed
+
+    frontier = []
+
+    def push(states):
+        states = [entry for entry in states if entry is not None]
+        for entry, key in zip(states, score([entry[0] for entry in states]) if states else []):
+            heapq.heappush(frontier, (key,) + entry)
+
+    push([candidates_after((), (1 << n) - 1, -1)])
+    while frontier:
+        key, bound, kind, prefix, leg, allowed = heapq.heappop(frontier)
+        if kind == 1:
+            first = bound[len(prefix)]
+            push([candidate(prefix, allowed, first), candidates_after(prefix, allowed, first)])
+        elif len(prefix) == k - 1:
+            yield bound, key
+        else:
+            push([candidates_after(prefix + (leg,), allowed & ~conflicts[leg], leg)])
+
+def best_first_parlays(legs, k):
+    """
+    Lazily yields (combo, parlay_odds) for conflict-free k-leg parlays in exact
+    ascending (parlay odds, combinations order). Legs are sorted by odds and parlay
+    odds are monotone in every leg, so the conflict-free frontier pops parlays in
+    order. Work grows with how many parlays the caller reads, not with C(n, k).
+    """
+    yield from conflict_free_frontier(legs, k, lambda combos: [parlay_odds_of(legs, combo) for combo in combos])
+
+def top_entries(legs, k, limit):
+    """
+    Branch-and-bound search for the `limit` most likely k-leg entries (for a fixed
+    payout, also the highest edge). Legs are already sorted from most to least likely,
+    so the best a partial entry can still reach is its probability times the next
+    consecutive legs; once that bound can't beat the current limit-th best, the
+    branch and every later sibling are pruned. The search visits combinations in
+    combinations order, so a later entry that only ties the worst kept one loses the
+    tie and can be pruned too. Each branch carries a bitset of the legs still allowed
+    next to the ones it has picked, so conflicting legs are never descended into.
+    Returns combos ordered by (probability desc, combinations order).
+    """
+    prob = [float(p) for p in legs["prob"]]
+    conflicts = legs["conflicts"]
+    n = len(prob)
+    if k > n or limit <= 0:
+        return []
+    # Negated probabilities are ascending, which lets bisect find the last viable leg
+    neg_prob = [-p for p in prob]
+    best = []  # min-heap of (probability, negated combo): the root is the worst kept entry
+
+    def threshold():
+        return best[0][0] if len(best) >= limit else -1.0
+
+    def offer(combined, combo):
+        key = (combined, tuple(-i for i in combo))
+        if len(best) < limit:
+            heapq.heappush(best, key)
+        elif key > best[0]:
+            heapq.heapreplace(best, key)
+
+    everything = (1 << n) - 1
+
+    def search(combo, combined, next_leg, allowed):
+        remaining = k - len(combo)
+        if remaining == 1:
+            # Last leg: every candidate that still reaches the threshold is a contiguous run
+            cutoff = threshold()
+            stop = n if cutoff < 0 else bisect_left(neg_prob, -(cutoff / combined), next_leg, n) + 1
+            for leg in range(next_leg, min(stop, n)):
+                if not allowed >> leg & 1:
+                    continue
+                value = combined * prob[leg]
+                if value <= threshold():
+                    break
+                offer(value, combo + (leg,))
+            return
+        for leg in range(next_leg, n - remaining + 1):
+            if not allowed >> leg & 1:
+                continue
+            partial = combined * prob[leg]
+            bound = partial
+            for following in range(leg + 1, leg + remaining):
+                bound *= prob[following]
+            if bound <= threshold():
+                break
+            search(combo + (leg,), partial, leg + 1, allowed & ~conflicts[leg])
+
+    for first in range(n - k + 1):
+        bound = prob[first]
+        for following in range(first + 1, first + k):
+            bound *= prob[following]
+        if bound <= threshold():
+            break
+        search((first,), prob[first], first + 1, everything & ~conflicts[first])
+
+    ranked = sorted(best, key=lambda entry: (-entry[0], tuple(-i for i in entry[1])))
+    return [tuple(-i for i in negated) for _, negated in ranked]
+
+# -----------------------------
+# Flex payouts
+# -----------------------------
+
+# Default flex payout ladders by entry size: {legs hit: payout multiple}. A sport's
+# Picks.py overrides any entry size whose ladder differs in its sport_flex_ladders.
+default_flex_ladders = {
+    3: {3: 2.25, 2: 1.25},
+    4: {4: 5.0, 3: 1.5},
+    5: {5: 10.0, 4: 2.0, 3: 0.4},
+    6: {6: 25.0, 5: 2.0, 4: 0.4},
+}
+
+def hit_distribution(prob_matrix):
+    """
+    Poisson-binomial DP over an (m, k) matrix of leg probabilities: returns (m, k + 1)
+    where column h is the chance exactly h legs hit. O(k²) per entry, vectorized
+    across all m entries, instead of enumerating the 2^k hit subsets.
+    """
+    m, k = prob_matrix.shape
+    dist = np.zeros((m, k + 1))
+    dist[:, 0] = 1.0
+    for leg in range(k):
+        p = prob_matrix[:, leg:leg + 1]
+        shifted = dist[:, :leg + 1] * p
+        dist[:, :leg + 1] *= 1.0 - p
+        dist[:, 1:leg + 2] += shifted
+    return dist
+
+def ladder_vector(ladder, k):
+    """{legs hit: payout multiple} -> payout per hit count 0..k (missing counts pay 0)."""
+    return np.array([float(ladder.get(hits, 0)) for hits in range(k + 1)])
+
+def flex_ev(legs, combos, ladder):
+    """Expected payout multiple of each k-leg entry in a combination block under a payout ladder."""
+    k = combos.shape[1]
+    dist = hit_distribution(legs["prob"][combos])
+    payouts = ladder_vector(ladder, k)
+    # Summed in a fixed order so an entry scores the same in any block (BLAS matmul may not)
+    ev = np.zeros(len(combos))
+    for hits in range(k + 1):
+        if payouts[hits]:
+            ev += dist[:, hits] * payouts[hits]
+    return ev
+
+def scan_top_flex(legs, k, ladder, limit):
+    """
+    Streams every conflict-free k-leg entry through the vectorized DP and keeps the
+    `limit` best by (flex EV desc, combinations order). Returns (combos, evs).
+    """
+    n = len(legs["decimal"])
+    best_combos = np.empty((0, k), dtype=np.int32)
+    best_ev = np.empty(0)
+    best_rank = np.empty(0, dtype=np.int64)
+    offset = 0
+    for combos in combination_chunks(n, k, conflicts=legs["conflicts"]):
+        ranks = np.arange(offset, offset + len(combos), dtype=np.int64)
+        offset += len(combos)
+        keep = conflict_free(legs, combos)
+        if not keep.all():
+            combos, ranks = combos[keep], ranks[keep]
+        evs = flex_ev(legs, combos, ladder)
+        if len(best_ev) >= limit:
+            keep = evs > best_ev[-1]
+            if not keep.any():
+                continue
+            combos, evs, ranks = combos[keep], evs[keep], ranks[keep]
+        best_combos = np.vstack([best_combos, combos])
+        best_ev = np.concatenate([best_ev, evs])
+        best_rank = np.concatenate([best_rank, ranks])
+        order = np.lexsort((best_rank, -best_ev))[:limit]
+        best_combos, best_ev, best_rank = best_combos[order], best_ev[order], best_rank[order]
+    return best_combos, best_ev
+
+def best_first_flex(legs, k, ladder):
+    """
+    Lazily yields (combo, flex EV) in exact (EV desc, combinations order). With a
+    ladder that never pays less for more hits, EV only falls as any leg moves to a
+    less likely one, so the same conflict-free frontier as best_first_parlays()
+    applies, keyed by negated EV; each pop scores its children in one vectorized DP call.
+    """
+    def score(combos):
+        return (-flex_ev(legs, np.array(combos), ladder)).tolist()
+
+    for combo, neg_ev in conflict_free_frontier(legs, k, score):
+        yield combo, -neg_ev
+
+def is_monotone_ladder(ladder, k):
+    payouts = ladder_vector(ladder, k)
+    return bool(np.all(np.diff(payouts) >= 0))
+
+# -----------------------------
+# Materializing picks
+# -----------------------------
+
+def parlay_entry(legs, combo, parlay_odds, implied_payout, vig_payout, expected_payout=None):
+    """
+    Builds the picks.json dict for one parlay, with the same formatting Picks.py used.
+    Entries ranked by flex EV also carry the expected payout multiple and its edge.
+    """
+    selections = [legs["selections"][i] for i in combo]
+    combined_prob = 1
+    for i in combo:
+        combined_prob *= float(legs["prob"][i])
+    implied_edge = ((implied_payout * combined_prob) - 1) * 100
+    vig_edge = ((vig_payout * combined_prob) - 1) * 100
+    entry = {
+        'parlay': selections,
+        'parlay_odds': f"{parlay_odds}",
+        'implied_odds': f"{combined_prob * 100:.2f}%",
+        'vig_odds': f"{combined_prob * 100:.2f}%",
+        'edge': f"{implied_edge:.2f}%",
+        'vig_edge': f"{vig_edge:.2f}%"
+    }
+    if expected_payout is not None:
+        entry['flex_ev'] = f"{expected_payout:.3f}x"
+        entry['flex_edge'] = f"{(expected_payout - 1) * 100:.2f}%"
+    return entry
+
+def iter_sorted_parlays(legs, k, implied_payout, vig_payout):
+    """
+    Yields k-leg parlay dicts in ascending parlay-odds order, built only as the
+    selection functions consume them. By default parlays come from the best-first
+    frontier, so the scan stops as soon as the selectors have enough. In "window"
+    mode only a bounded window of the best parlays is held; if the selectors read
+    past it, it is recomputed 4x larger and iteration continues where it left off.
+    """
+    if enumeration_mode == "best_first":
+        for combo, odds in best_first_parlays(legs, k):
+            yield parlay_entry(legs, combo, odds, implied_payout, vig_payout)
+        return
+
+    n = len(legs["selections"])
+    total = comb(n, k) if k <= n else 0
+    yielded = 0
+    limit = initial_window
+    while yielded < total:
+        combos, parlay_odds = top_parlays(legs, k, limit)
+        for combo, odds in zip(combos[yielded:], parlay_odds[yielded:]):
+            yield parlay_entry(legs, combo.tolist(), int(odds), implied_payout, vig_payout)
+        yielded = len(parlay_odds)
+        if yielded < limit:
+            # Fewer than asked for: every conflict-free parlay has been yielded
+            return
+        limit *= 4
+
+def iter_top_entries(legs, k, implied_payout, vig_payout):
+    """
+    Yields k-leg entry dicts from most to least likely, using the branch-and-bound
+    search on a window that grows 4x only if the selection functions read past it.
+    """
+    n = len(legs["selections"])
+    total = comb(n, k) if k <= n else 0
+    yielded = 0
+    limit = initial_window
+    while yielded < total:
+        combos = top_entries(legs, k, limit)
+        for combo in combos[yielded:]:
+            yield parlay_entry(legs, combo, parlay_odds_of(legs, combo), implied_payout, vig_payout)
+        yielded = len(combos)
+        if yielded < limit:
+            return
+        limit *= 4
+
+def iter_flex_entries(legs, k, implied_payout, vig_payout, ladder):
+    """
+    Yields k-leg entry dicts from highest to lowest flex EV under `ladder`. Monotone
+    ladders use the lazy best-first frontier; any other ladder falls back to
+    vectorized window scans that grow 4x as the selection functions read on.
+    """
+    if is_monotone_ladder(ladder, k):
+        for combo, ev in best_first_flex(legs, k, ladder):
+            yield parlay_entry(legs, combo, parlay_odds_of(legs, combo), implied_payout, vig_payout, ev)
+        return
+
+    n = len(legs["decimal"])
+    total = comb(n, k) if k <= n else 0
+    yielded = 0
+    limit = initial_window
+    while yielded < total:
+        combos, evs = scan_top_flex(legs, k, ladder, limit)
+        for combo, ev in zip(combos[yielded:].tolist(), evs[yielded:].tolist()):
+            yield parlay_entry(legs, combo, parlay_odds_of(legs, combo), implied_payout, vig_payout, ev)
+        yielded = len(evs)
+        if yielded < limit:
+            return
+        limit *= 4
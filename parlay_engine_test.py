@@ -0,0 +1,68 @@
+import random
+from itertools import combinations
+import numpy as np
+from parlay_engine import (
+    build_leg_table, selection_odds, has_conflict, parlay_odds_of, flex_ev,
+    best_first_parlays, best_first_flex,
+)
+
+# Brute-force checks that the best-first frontiers yield every conflict-free entry in
+# exact order, for every conflict rule. Run with `python -m pytest parlay_engine_test.py`
+# or directly with `python parlay_engine_test.py`.
+
+players = ["A. One", "B. Two", "C. Three", "D. Four"]
+stats = ["points", "rebounds", "assists", "threes", "pra", "pr"]
+games = ["AAA @ BBB", "CCC @ DDD"]
+odds_choices = ["-150", "-140", "-135", "-130", "-125", "-120", "-115", "-110", "+100", "+105", "+120"]
+rule_sets = [[], ["player"], ["related"], ["game"], ["player", "game"], ["related", "game"]]
+
+def random_slate(rng, n):
+    selections = set()
+    while len(selections) < n:
+        player = rng.choice(players)
+        game = games[players.index(player) % len(games)]
+        selections.add(f"{player}, over {rng.randint(1, 30)}.5 {rng.choice(stats)}, {rng.choice(odds_choices)}, {game}, 7:00PM")
+    return sorted(selections, key=selection_odds)
+
+def brute_force(legs, k, key):
+    combos = [combo for combo in combinations(range(len(legs["selections"])), k) if not has_conflict(legs, combo)]
+    return sorted(((key(combo), combo) for combo in combos), key=lambda item: (item[0], item[1]))
+
+def check_parlays(legs, k):
+    expected = [(combo, odds) for odds, combo in brute_force(legs, k, lambda combo: parlay_odds_of(legs, combo))]
+    assert list(best_first_parlays(legs, k)) == expected
+
+def check_flex(legs, k, ladder):
+    expected = [(combo, -neg_ev) for neg_ev, combo in brute_force(
+        legs, k, lambda combo: -float(flex_ev(legs, np.array([combo]), ladder)[0]))]
+    assert list(best_first_flex(legs, k, ladder)) == expected
+
+def test_related_rule_repro():
+    """Six legs where conflicts aren't transitive: a later candidate can complete earlier than the first."""
+    rng = random.Random(7)
+    for _ in range(50):
+        legs = build_leg_table(random_slate(rng, 6), ["related"])
+        check_parlays(legs, 2)
+
+def test_best_first_parlays_order():
+    rng = random.Random(0)
+    for case in range(300):
+        rules = rule_sets[case % len(rule_sets)]
+        legs = build_leg_table(random_slate(rng, rng.randint(4, 12)), rules)
+        for k in (2, 3, 4):
+            check_parlays(legs, k)
+
+def test_best_first_flex_order():
+    rng = random.Random(1)
+    ladders = {3: {3: 2.25, 2: 1.25}, 4: {4: 5.0, 3: 1.5}}
+    for case in range(120):
+        rules = rule_sets[case % len(rule_sets)]
+        legs = build_leg_table(random_slate(rng, rng.randint(4, 10)), rules)
+        for k, ladder in ladders.items():
+            check_flex(legs, k, ladder)
+
+if __name__ == "__main__":
+    test_related_rule_repro()
+    test_best_first_parlays_order()
+    test_best_first_flex_order()
+    print("✅ Best-first order matches brute force for every conflict rule")
@@ -0,0 +1,448 @@
+import os
+import sys
+import json
+import time
+import runpy
+import threading
+import importlib.util
+import multiprocessing
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from build_cache import cached_call, prune
+from workspace import run_workspace
+from pipeline_state import run_lock, retry_timers
+import work_queue
+import freshness
+
+root_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Sports refreshed by a pipeline run
+sports = [sport for sport in os.getenv("PIPELINE_SPORTS", "wnba,mlb,nhl").split(",") if sport]
+
+# Threads for scraping, HTTP and small file work; processes for Picks and ranking.
+# Queued scrapes hold a thread while they wait on a worker node, so queue mode needs more.
+io_workers = int(os.getenv("PIPELINE_IO_WORKERS", "96" if work_queue.queue_url else "24"))
+cpu_workers = int(os.getenv("PIPELINE_CPU_WORKERS", str(min(os.cpu_count() or 1, 3))))
+
+# DraftKings requests in flight per sport (ScrapeDK used to fetch them one at a time)
+dk_concurrency = int(os.getenv("PIPELINE_DK_CONCURRENCY", "2"))
+
+# Run each pipeline in its own runs/<id> workspace and publish it by swapping the `published` symlink
+use_workspaces = os.getenv("PIPELINE_WORKSPACES") == "1"
+
+# With PIPELINE_QUEUE set, per-stat scrapes are queued for worker nodes instead of run here
+use_queue = bool(work_queue.queue_url)
+
+# A stat whose scrape fails keeps serving its last good file, and only that stat is
+# rerun this many seconds later, up to `retry_limit` times (inline in a one-shot run,
+# on a timer in the daemon)
+retry_delay = int(os.getenv("PIPELINE_RETRY_DELAY", "120"))
+retry_limit = int(os.getenv("PIPELINE_RETRY_LIMIT", "2"))
+
+def code_file(path):
+    """Scripts and modules live at the repo root, whatever directory the run works in."""
+    return os.path.join(root_dir, path)
+
+# Shared modules every Picks run depends on, so editing one invalidates the cached picks
+engine_files = [code_file(name) for name in ("parlay_engine.py", "portfolio.py", "simulator.py", "incremental.py", "profile_sweep.py")]
+
+class Node:
+    """
+    One unit of work in the run. It starts as soon as everything in `deps` has finished.
+    With `pass_results`, the dependencies' return values are passed after `args`. A node
+    whose dependency failed is skipped, unless it's `soft` (merges and publishing), which
+    runs anyway with None in place of the failed results. A node with a `cache` spec
+    (inputs, outputs, params) is skipped when those hash the same as last run.
+    """
+
+    def __init__(self, name, func, args=(), deps=(), kind="io", soft=False, pass_results=False, cache=None):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.deps = list(deps)
+        self.kind = kind
+        self.soft = soft
+        self.pass_results = pass_results
+        self.cache = cache
+
+# Sport scripts imported into this process, by unique module name
+modules = {}
+module_lock = threading.Lock()
+
+def sport_module(sport, script):
+    """Imports <sport>/<script>.py once, under a per-sport name so every sport's copy can share the process."""
+    name = f"{sport}_{script}"
+    with module_lock:
+        if name not in modules:
+            spec = importlib.util.spec_from_file_location(name, os.path.join(root_dir, sport, f"{script}.py"))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            modules[name] = module
+        return modules[name]
+
+def run_script(path):
+    """Runs a module-level script as `python path` would. Used for CPU nodes in the process pool."""
+    runpy.run_path(code_file(path), run_name="__main__")
+
+def call_in(workdir, func, *args, **kwargs):
+    """Runs func from `workdir`. CPU workers can outlive a run, so every task sets its own."""
+    os.chdir(workdir)
+    return func(*args, **kwargs)
+
+def fetch_dk(sport, stat, limiter):
+    dk = sport_module(sport, "ScrapeDK")
+    with limiter:
+        if not dk.fetch_and_save_json(dk.urls[stat], f"{stat}.json"):
+            raise RuntimeError(f"DraftKings fetch failed for {sport} {stat}")
+
+def scrape_p6(sport, stat):
+    p6 = sport_module(sport, "ScrapeP6")
+    label, url = p6.urls[stat]
+    return p6.scrape_and_save(stat, label, url)
+
+def remote_dk(sport, stat):
+    work_queue.run_remote(sport, "dk", stat)
+
+def remote_p6(sport, stat):
+    return set(work_queue.run_remote(sport, "p6", stat))
+
+def prepare_p6(sport):
+    """Start of a sport's Pick6 scrapes: reload the allowlist and record last run's option counts."""
+    p6 = sport_module(sport, "ScrapeP6")
+    p6.reset_allowlist()
+    p6.clear_stats_files()
+
+def finish_p6(sport, *locked_sets):
+    all_locked = set()
+    for locked in locked_sets:
+        all_locked.update(locked or ())
+    sport_module(sport, "ScrapeP6").finish_scraping(all_locked)
+
+def save_selections(sport, *parts):
+    sport_module(sport, "Selection").save_selections([selection for part in parts for selection in part or ()])
+
+def env_params(prefix):
+    """Every environment setting under `prefix`, as cache parameters."""
+    return {key: value for key, value in os.environ.items() if key.startswith(prefix)}
+
+def picks_cache(sport):
+    """What one sport's Picks reads and writes, including the optional state and profile files."""
+    inputs = [f"{sport}/selections/selections.json", code_file(f"{sport}/Picks.py")] + engine_files
+    outputs = [f"{sport}/picks.json"]
+    if os.getenv("PICKS_INCREMENTAL") == "1" and os.getenv("PICKS_ENUMERATION") == "window":
+        outputs.append(f"{sport}/picks_state.json")
+    profiles_file = os.getenv("PICKS_PROFILES")
+    if profiles_file:
+        inputs.append(profiles_file)
+        with open(profiles_file, "r") as f:
+            outputs += [f"{sport}/picks_{profile['name']}.json" for profile in json.load(f)]
+    return {"inputs": inputs, "outputs": outputs, "params": env_params("PICKS_")}
+
+# A failed upload raises so the publish step isn't cached and the next run retries it
+def publish_parlays():
+    import generate_parlays
+    if not generate_parlays.generate_parlays():
+        raise RuntimeError("generated_parlays.json was written but not uploaded")
+
+def publish_builder_data():
+    import generate_parlays
+    if not generate_parlays.generate_parlay_builder_data():
+        raise RuntimeError("parlay_builder_data.json was written but not uploaded")
+
+def expired_params(paths):
+    """Which of a step's inputs are stale past the budget, since those are read as missing."""
+    return {path: freshness.state(path) == "expired" for path in paths}
+
+def sport_nodes(sport, only=None):
+    """
+    Per-stat DK fetch, Pick6 scrape, extract and select nodes for one sport, then its
+    selections merge, Picks and Locks. Each stat's selection waits only on its own lines
+    and options, and Picks waits only on its own sport. In queue mode the per-stat
+    scrapes are claimed by whichever worker node is free and their files copied back.
+    With `only` ({"dk": stats, "p6": stats}), just those stats are scraped again and
+    everything downstream reruns on top of the files already there.
+    """
+    dk = sport_module(sport, "ScrapeDK")
+    p6 = sport_module(sport, "ScrapeP6")
+    stats = getattr(sport_module(sport, "Fetch"), f"{sport}_stat_types")
+    limiter = threading.Semaphore(dk_concurrency)
+    nodes = []
+
+    for stat in dk.urls:
+        if only is not None and stat not in only["dk"]:
+            continue
+        if use_queue:
+            nodes.append(Node(f"dk:{sport}:{stat}", remote_dk, (sport, stat)))
+        else:
+            nodes.append(Node(f"dk:{sport}:{stat}", fetch_dk, (sport, stat, limiter)))
+
+    if only is not None:
+        # Retried stats are scraped one page each, even in single-page mode
+        nodes.append(Node(f"p6:{sport}:prepare", prepare_p6, (sport,)))
+        for stat in only["p6"]:
+            nodes.append(Node(f"p6:{sport}:{stat}", remote_p6 if use_queue else scrape_p6, (sport, stat), [f"p6:{sport}:prepare"]))
+        p6_deps = {stat: [f"p6:{sport}:{stat}"] if stat in only["p6"] else [] for stat in stats}
+    elif p6.single_page_mode:
+        # All stats come off one page, so the scrape is a single node
+        nodes.append(Node(f"p6:{sport}", p6.run_scraping))
+        p6_deps = {stat: [f"p6:{sport}"] for stat in stats}
+    else:
+        nodes.append(Node(f"p6:{sport}:prepare", prepare_p6, (sport,)))
+        for stat in p6.urls:
+            nodes.append(Node(f"p6:{sport}:{stat}", remote_p6 if use_queue else scrape_p6, (sport, stat), [f"p6:{sport}:prepare"]))
+        nodes.append(Node(
+            f"p6:{sport}:locked", finish_p6, (sport,), [f"p6:{sport}:{stat}" for stat in p6.urls],
+            soft=True, pass_results=True,
+        ))
+        p6_deps = {stat: [f"p6:{sport}:{stat}"] for stat in stats}
+
+    fetch = sport_module(sport, "Fetch")
+    selection = sport_module(sport, "Selection")
+    for stat in stats:
+        # A failed fetch leaves last run's data in place, so there's nothing new to extract
+        dk_deps = [f"dk:{sport}:{stat}"] if only is None or stat in only["dk"] else []
+        lines_file = f"{sport}/lines/{stat}_lines.json"
+        options_file = f"{sport}/options/{stat}_options.json"
+        nodes.append(Node(
+            f"extract:{sport}:{stat}", fetch.extract_stat, (stat,), dk_deps,
+            cache={"inputs": [f"{sport}/data/{stat}.json", code_file(f"{sport}/Fetch.py")], "outputs": [f"{sport}/lines/{stat}_lines.json"]},
+        ))
+        # Selection reads whatever lines and options are on disk, stale or not, until they expire
+        nodes.append(Node(
+            f"select:{sport}:{stat}", selection.process_category, (stat,),
+            [f"extract:{sport}:{stat}"] + p6_deps[stat], soft=True,
+            cache={
+                "inputs": [lines_file, options_file, code_file(f"{sport}/Selection.py")],
+                "params": partial(expired_params, [lines_file, options_file]),
+            },
+        ))
+
+    # The merge's arguments are the per-stat selections, so they are its fingerprint
+    nodes.append(Node(
+        f"select:{sport}", save_selections, (sport,), [f"select:{sport}:{stat}" for stat in stats],
+        soft=True, pass_results=True,
+        cache={"inputs": [code_file(f"{sport}/Selection.py")], "outputs": [f"{sport}/selections/selections.json"]},
+    ))
+    nodes.append(Node(
+        f"picks:{sport}", run_script, (f"{sport}/Picks.py",), [f"select:{sport}"], kind="cpu",
+        cache=picks_cache(sport),
+    ))
+    nodes.append(Node(
+        f"locks:{sport}", sport_module(sport, "Locks").main, (),
+        [f"extract:{sport}:{stat}" for stat in stats], soft=True,
+    ))
+    return nodes
+
+def build_graph(selected=None, retry=None):
+    """
+    The full run for `selected` sports (default: all configured), plus cross-sport
+    ranking and publishing. `retry` limits the scrapes to the stats it lists per sport.
+    """
+    selected = selected or sports
+    nodes = []
+    for sport in selected:
+        nodes.extend(sport_nodes(sport, retry[sport] if retry else None))
+    nodes.append(Node(
+        "cross_sport", run_script, ("cross_sport.py",), [f"select:{sport}" for sport in selected], kind="cpu", soft=True,
+        cache={
+            "inputs": ["*/selections/selections.json", "selections/selections.json", code_file("cross_sport.py"), code_file("parlay_engine.py"),
+                       code_file("Picks.py"), code_file("*/Picks.py")],
+            "outputs": ["leaderboard.json"],
+            "params": env_params("PICKS_"),
+        },
+    ))
+    # Publishing is skipped outright (GitHub upload included) when nothing it reads changed
+    nodes.append(Node(
+        "publish:parlays", publish_parlays, (), [f"picks:{sport}" for sport in selected], soft=True,
+        cache={"inputs": ["*/picks.json", code_file("generate_parlays.py")], "outputs": ["generated_parlays.json"]},
+    ))
+    nodes.append(Node(
+        "publish:builder", publish_builder_data, (),
+        [node.name for node in nodes if node.name.startswith("extract:")], soft=True,
+        cache={"inputs": ["*/lines/*_lines.json", code_file("generate_parlays.py")], "outputs": ["parlay_builder_data.json"]},
+    ))
+    return nodes
+
+def critical_path(nodes, timings):
+    """Walks back from the last node to finish through whichever dependency finished last."""
+    by_name = {node.name: node for node in nodes}
+    current = max(timings, key=lambda name: timings[name][1])
+    path = [current]
+    while True:
+        deps = [dep for dep in by_name[current].deps if dep in timings]
+        if not deps:
+            break
+        current = max(deps, key=lambda name: timings[name][1])
+        path.append(current)
+    return path[::-1]
+
+def make_pools():
+    """The I/O thread pool and CPU process pool. Spawned workers start clean instead of forking a process full of scraper threads."""
+    io_pool = ThreadPoolExecutor(max_workers=io_workers)
+    cpu_pool = ProcessPoolExecutor(max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn"))
+    return io_pool, cpu_pool
+
+def run_graph(nodes, pools=None):
+    """
+    Runs every node as soon as its dependencies are done: I/O nodes on a thread pool,
+    CPU nodes on a process pool. Pass long-lived `pools` to keep workers warm between
+    runs; otherwise they're created and shut down here. Returns (results, failed node
+    names, timings).
+    """
+    by_name = {node.name: node for node in nodes}
+    missing = {dep for node in nodes for dep in node.deps if dep not in by_name}
+    if missing:
+        raise ValueError(f"Unknown pipeline dependencies: {sorted(missing)}")
+
+    pending = dict(by_name)
+    results = {}
+    failed = set()
+    timings = {}
+    running = {}
+    started = time.time()
+
+    io_pool, cpu_pool = pools or make_pools()
+    try:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, node in list(pending.items()):
+                    if not all(dep in results or dep in failed for dep in node.deps):
+                        continue
+                    del pending[name]
+                    progressed = True
+                    blocked = [dep for dep in node.deps if dep in failed]
+                    if blocked and not node.soft:
+                        print(f"⏭️ Skipping {name}: {', '.join(blocked)} failed")
+                        failed.add(name)
+                        continue
+                    args = node.args + (tuple(results.get(dep) for dep in node.deps) if node.pass_results else ())
+                    if node.cache is not None:
+                        call = (cached_call, name, node.func, args)
+                        kwargs = node.cache
+                    else:
+                        call = (node.func,) + args
+                        kwargs = {}
+                    if node.kind == "cpu":
+                        future = cpu_pool.submit(call_in, os.getcwd(), *call, **kwargs)
+                    else:
+                        future = io_pool.submit(*call, **kwargs)
+                    running[future] = (name, time.time())
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, start = running.pop(future)
+                timings[name] = (start - started, time.time() - started)
+                try:
+                    results[name] = future.result()
+                    print(f"✅ {name} ({timings[name][1] - timings[name][0]:.1f}s)")
+                except (Exception, SystemExit) as e:
+                    failed.add(name)
+                    print(f"❌ {name}: {e}")
+    finally:
+        if pools is None:
+            io_pool.shutdown(wait=True)
+            cpu_pool.shutdown(wait=True)
+    return results, failed, timings
+
+def failed_refreshes(selected, since):
+    """Stats whose DK fetch or Pick6 scrape failed since `since`, as {sport: {"dk": stats, "p6": stats}}."""
+    retry = {}
+    for sport in selected:
+        for source, script in (("dk", "ScrapeDK"), ("p6", "ScrapeP6")):
+            for stat in sport_module(sport, script).urls:
+                meta = freshness.read_meta(work_queue.task_output(sport, source, stat)) or {}
+                if meta.get("state") == "stale" and meta.get("failed_at", 0) >= since:
+                    retry.setdefault(sport, {"dk": set(), "p6": set()})[source].add(stat)
+    return retry
+
+def describe_retry(retry):
+    return "; ".join(f"{sport} {', '.join(sorted(stats['dk'] | stats['p6']))}" for sport, stats in retry.items())
+
+def run_retry(retry, attempt, pools):
+    try:
+        run_pipeline(pools=pools, retry=retry, attempt=attempt)
+    except Exception as e:
+        print(f"❌ Retry of {', '.join(retry)} failed: {e}")
+
+def schedule_retry(retry, attempt, pools):
+    """
+    Reruns just the failed stats after `retry_delay` on a timer, reusing the resident
+    process's pools. Timers are daemon threads: they only fire in a process that stays
+    up, like daemon.py, and never keep a finished process alive.
+    """
+    print(f"🔁 Retrying {describe_retry(retry)} in {retry_delay}s (attempt {attempt} of {retry_limit})")
+    timer = threading.Timer(retry_delay, run_retry, (retry, attempt, pools))
+    timer.daemon = True
+    retry_timers.append(timer)
+    timer.start()
+
+def cancel_retries():
+    for timer in retry_timers:
+        timer.cancel()
+    retry_timers.clear()
+
+def run_pipeline(selected=None, pools=None, retry=None, attempt=0):
+    """
+    Builds the DAG for the selected sports (default: all configured) and runs it to
+    completion. With `retry`, only the listed stats are scraped again.
+
+    Failed stats are retried after `retry_delay`, at most `retry_limit` times. A resident
+    caller (one passing long-lived `pools`, like the daemon) gets the retries on timers
+    and returns at once; a one-shot run waits and retries inline, so it ends within
+    `retry_limit` delays of finishing.
+    """
+    if root_dir not in sys.path:
+        sys.path.insert(0, root_dir)
+    resident = pools is not None
+    if not resident:
+        pools = make_pools()
+    try:
+        results, failed, stale = run_locked(selected, pools, retry)
+        while stale and attempt < retry_limit:
+            attempt += 1
+            if resident:
+                schedule_retry(stale, attempt, pools)
+                break
+            print(f"🔁 Retrying {describe_retry(stale)} in {retry_delay}s (attempt {attempt} of {retry_limit})")
+            time.sleep(retry_delay)
+            results, failed, stale = run_locked(None, pools, stale)
+        else:
+            if stale and retry_limit:
+                print(f"⚠️ Giving up on {describe_retry(stale)} until the next scheduled run")
+    finally:
+        if not resident:
+            for pool in pools:
+                pool.shutdown(wait=True)
+    return results, failed
+
+def run_locked(selected, pools, retry):
+    """One run under the process's run lock, in its own workspace when enabled. Returns (results, failed, stale)."""
+    selected = list(retry) if retry else selected or sports
+    with run_lock:
+        if use_workspaces:
+            # Every configured sport is carried into the workspace, whichever are refreshed
+            with run_workspace(sports + [sport for sport in selected if sport not in sports]):
+                return run_in_place(selected, pools, retry)
+        return run_in_place(selected, pools, retry)
+
+def run_in_place(selected, pools=None, retry=None):
+    """
+    One pipeline run reading and writing relative to the current directory. Returns
+    (results, failed, stale), where `stale` lists the stats whose refresh failed.
+    """
+    started = time.time()
+    nodes = build_graph(selected, retry)
+    print(f"🧩 Pipeline: {len(nodes)} nodes across {', '.join(selected)}")
+    results, failed, timings = run_graph(nodes, pools)
+    prune()
+    print(f"\n⏱️ Pipeline finished in {time.time() - started:.2f} seconds ({len(failed)} failed or skipped)")
+    if timings:
+        print(f"🛤️ Critical path: {' → '.join(critical_path(nodes, timings))}")
+    return results, failed, failed_refreshes(selected, started)
+
+if __name__ == "__main__":
+    run_pipeline()
@@ -0,0 +1,10 @@
+import threading
+
+# Process-wide pipeline state. It lives outside pipeline.py so the daemon's code reload,
+# which re-executes pipeline.py, keeps the same lock and pending retries.
+
+# Runs share the working directory and the scripts' module state, so a process runs one at a time
+run_lock = threading.Lock()
+
+# Timers for pending stat retries
+retry_timers = []
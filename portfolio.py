@@ -0,0 +1,242 @@
+import os
+from itertools import islice
+import numpy as np
+from parlay_engine import best_first_parlays, top_entries, parlay_entry, parlay_odds_of
+
+# Best entries per size the optimizer chooses from
+pool_size = int(os.getenv("PICKS_PORTFOLIO_POOL", "4000"))
+
+# Optional exposure caps across the chosen entries of one size (unset = no cap)
+max_per_game = int(os.getenv("PICKS_MAX_PER_GAME", "0")) or None
+max_per_player = int(os.getenv("PICKS_MAX_PER_PLAYER", "0")) or None
+
+# Exact search runs on pools this small (or always with PICKS_PORTFOLIO_EXACT=1) and
+# gives up after this many nodes, keeping the best set found so far
+exact_pool_limit = 300
+exact_node_budget = 20000
+force_exact = os.getenv("PICKS_PORTFOLIO_EXACT") == "1"
+
+# Local-search passes over the selected set before settling
+max_passes = 20
+
+def candidate_pool(legs, k, implied_payout, limit=None):
+    """
+    The `limit` most likely conflict-free k-leg entries as (combos, edges), ordered by
+    edge (highest first, ties in combinations order). Edge is the all-hit edge Picks reports.
+    """
+    limit = limit or pool_size
+    if k <= 3:
+        combos = [combo for combo, _ in islice(best_first_parlays(legs, k), limit)]
+    else:
+        combos = top_entries(legs, k, limit)
+    combos = np.array(combos, dtype=np.int64).reshape(-1, k)
+    prob = legs["prob"][combos[:, 0]]
+    for position in range(1, k):
+        prob = prob * legs["prob"][combos[:, position]]
+    edges = implied_payout * prob - 1
+    order = np.argsort(-edges, kind="stable")
+    return combos[order], edges[order]
+
+def group_ids(values):
+    """Maps each value to a dense integer id, in first-seen order."""
+    ids = {}
+    return np.array([ids.setdefault(value, len(ids)) for value in values], dtype=np.int64), len(ids)
+
+class Portfolio:
+    """
+    Array-backed exposure state for choosing entries out of a candidate pool.
+    Every candidate's legs, pairs, games and players are integer ids, so checking all
+    candidates against the current usage is a handful of vectorized gathers.
+    """
+
+    def __init__(self, legs, combos, edges, max_individual, max_pair=None, max_game=None, max_player=None):
+        self.combos = combos
+        self.edges = edges
+        self.max_individual = max_individual
+        self.max_pair = max_pair
+        self.max_game = max_game
+        self.max_player = max_player
+        n = len(legs["selections"])
+        k = combos.shape[1]
+        fields = [selection.split(", ") for selection in legs["selections"]]
+        game_of, game_count = group_ids(parts[3] if len(parts) > 3 else "" for parts in fields)
+        player_of, player_count = group_ids(parts[0] for parts in fields)
+
+        pair_columns = [combos[:, a] * n + combos[:, b] for a in range(k) for b in range(a + 1, k)]
+        self.pairs = np.stack(pair_columns, axis=1) if pair_columns else np.empty((len(combos), 0), dtype=np.int64)
+        self.games = game_of[combos]
+        self.players = player_of[combos]
+        # How many legs of the same game / player each position shares its entry with
+        self.game_multiplicity = (self.games[:, :, None] == self.games[:, None, :]).sum(axis=2)
+        self.player_multiplicity = (self.players[:, :, None] == self.players[:, None, :]).sum(axis=2)
+
+        self.leg_use = np.zeros(n, dtype=np.int64)
+        self.pair_use = np.zeros(n * n, dtype=np.int64)
+        self.game_use = np.zeros(game_count, dtype=np.int64)
+        self.player_use = np.zeros(player_count, dtype=np.int64)
+        self.selected = np.zeros(len(combos), dtype=bool)
+        # Candidates a local-search move has just taken out and may not put straight back
+        self.banned = np.zeros(len(combos), dtype=bool)
+
+    def feasible(self, start=0):
+        """Mask of unselected candidates from `start` on that fit under every cap right now."""
+        ok = ~(self.selected[start:] | self.banned[start:])
+        ok &= (self.leg_use[self.combos[start:]] < self.max_individual).all(axis=1)
+        if self.max_pair is not None and self.pairs.shape[1]:
+            ok &= (self.pair_use[self.pairs[start:]] < self.max_pair).all(axis=1)
+        if self.max_game is not None:
+            ok &= (self.game_use[self.games[start:]] + self.game_multiplicity[start:] <= self.max_game).all(axis=1)
+        if self.max_player is not None:
+            ok &= (self.player_use[self.players[start:]] + self.player_multiplicity[start:] <= self.max_player).all(axis=1)
+        return ok
+
+    def update(self, index, delta):
+        self.selected[index] = delta > 0
+        np.add.at(self.leg_use, self.combos[index], delta)
+        np.add.at(self.pair_use, self.pairs[index], delta)
+        np.add.at(self.game_use, self.games[index], delta)
+        np.add.at(self.player_use, self.players[index], delta)
+
+    def add(self, index):
+        self.update(index, 1)
+
+    def remove(self, index):
+        self.update(index, -1)
+
+    def fill(self, slots):
+        """Greedily adds up to `slots` best feasible candidates; returns what was added."""
+        added = []
+        for _ in range(slots):
+            ok = self.feasible()
+            if not ok.any():
+                break
+            index = int(np.argmax(ok))
+            self.add(index)
+            added.append(index)
+        return added
+
+    def chosen(self):
+        return [int(i) for i in np.flatnonzero(self.selected)]
+
+    def total(self):
+        return float(self.edges[self.selected].sum())
+
+def improve(portfolio, count):
+    """
+    Local search on a filled portfolio: tries swapping one chosen entry, then two, for
+    the best entries that fit once they're gone, and keeps any swap that raises total
+    edge. Two-for-two swaps undo the greedy's mistake of taking an entry that uses up
+    two capped legs another pair of entries would have shared.
+    """
+    for _ in range(max_passes):
+        improved = False
+        chosen = portfolio.chosen()
+        moves = [(a,) for a in chosen] + [
+            (a, b) for i, a in enumerate(chosen) for b in chosen[i + 1:]
+        ]
+        if len(chosen) < count:
+            moves.insert(0, ())
+        for removed in moves:
+            before = sum(float(portfolio.edges[i]) for i in removed)
+            for index in removed:
+                portfolio.remove(index)
+                portfolio.banned[index] = True
+            added = portfolio.fill(count - len(portfolio.chosen()))
+            portfolio.banned[:] = False
+            after = sum(float(portfolio.edges[i]) for i in added)
+            if len(added) > len(removed) or (len(added) == len(removed) and after > before + 1e-12):
+                improved = True
+                break
+            for index in added:
+                portfolio.remove(index)
+            for index in removed:
+                portfolio.add(index)
+        if not improved:
+            break
+    return portfolio
+
+def solve_exact(portfolio, count):
+    """
+    Branch-and-bound over the edge-ordered pool, seeded with the current (heuristic)
+    selection. Portfolios compare on (entries chosen, total edge); since the pool is
+    sorted by edge, once picking the next candidate can't beat the incumbent even with
+    the best edges after it, no later candidate can either. Stops at the node budget
+    and keeps the best set found.
+    """
+    m = len(portfolio.edges)
+    edges = portfolio.edges.tolist()
+    cumulative = np.concatenate([[0.0], np.cumsum(portfolio.edges)]).tolist()
+    incumbent = portfolio.chosen()
+    best = [len(incumbent), portfolio.total(), incumbent]
+    for index in incumbent:
+        portfolio.remove(index)
+    nodes = 0
+
+    def search(position, chosen, total):
+        nonlocal nodes
+        nodes += 1
+        if len(chosen) > best[0] or (len(chosen) == best[0] and total > best[1] + 1e-12):
+            best[:] = [len(chosen), total, list(chosen)]
+        if len(chosen) == count:
+            return
+        remaining = count - len(chosen)
+        for index in np.flatnonzero(portfolio.feasible(position)).tolist():
+            index += position
+            reach = len(chosen) + min(remaining, m - index)
+            bound = total + cumulative[min(index + remaining, m)] - cumulative[index]
+            if reach < best[0] or (reach == best[0] and bound <= best[1] + 1e-12):
+                break
+            if nodes > exact_node_budget:
+                return
+            portfolio.add(index)
+            chosen.append(index)
+            search(index + 1, chosen, total + edges[index])
+            chosen.pop()
+            portfolio.remove(index)
+
+    search(0, [], 0.0)
+    for index in best[2]:
+        portfolio.add(index)
+    return portfolio
+
+def optimize(portfolio, count, exact=None):
+    """Improves a greedily filled portfolio with local search, then exact search when the pool is small."""
+    improve(portfolio, count)
+    if exact is None:
+        exact = force_exact or len(portfolio.combos) <= exact_pool_limit
+    if exact:
+        solve_exact(portfolio, count)
+    return portfolio.chosen()
+
+def select_portfolio(legs, combos, edges, count, max_individual, max_pair=None,
+                     max_game=None, max_player=None, exact=None):
+    """
+    Chooses up to `count` candidates maximizing total edge under per-leg, per-pair,
+    per-game and per-player caps: greedy fill, local-search swaps, then an exact search
+    when the pool is small enough. Returns candidate indices, best edge first.
+    """
+    portfolio = Portfolio(legs, combos, edges, max_individual, max_pair, max_game, max_player)
+    portfolio.fill(count)
+    return optimize(portfolio, count, exact)
+
+def portfolio_entries(legs, k, implied_payout, vig_payout, desired_number, max_individual, max_pair=None):
+    """
+    Drop-in for the greedy selectors: the optimized k-leg entries as picks.json dicts.
+    If the caps leave the greedy fill short of `desired_number`, the pool grows 4x first,
+    so the optimizer always starts from at least what the greedy scan would find.
+    """
+    limit = pool_size
+    while True:
+        combos, edges = candidate_pool(legs, k, implied_payout, limit)
+        if not len(combos):
+            return []
+        portfolio = Portfolio(legs, combos, edges, max_individual, max_pair, max_per_game, max_per_player)
+        portfolio.fill(desired_number)
+        if len(portfolio.chosen()) >= desired_number or len(combos) < limit:
+            break
+        limit *= 4
+    chosen = optimize(portfolio, desired_number)
+    return [
+        parlay_entry(legs, combo, parlay_odds_of(legs, combo), implied_payout, vig_payout)
+        for combo in (combos[i].tolist() for i in chosen)
+    ]
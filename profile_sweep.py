@@ -0,0 +1,135 @@
+import json
+from itertools import islice
+import numpy as np
+from parlay_engine import best_first_parlays, top_entries, parlay_entry, parlay_odds_of
+from portfolio import Portfolio, optimize
+
+# A profiles file is a JSON list like:
+# [
+#     {
+#         "name": "standard",
+#         "payouts": {"2": [3.3, 3.0], "3": [5.5, 5.0]},
+#         "counts": {"2": 15, "3": 12},
+#         "max_individual": 3,
+#         "max_pair": 2,
+#         "selection": "greedy"
+#     }
+# ]
+# payouts are (implied payout, vig payout) per entry size; max_pair applies to 3+ leg entries
+# like it does in Picks; selection is "greedy" (Picks' ordered scan) or "portfolio".
+
+# Candidates enumerated per entry size before any profile needs more, and the most a
+# size may grow to for a profile whose caps can't be filled
+initial_pool = 20000
+max_pool = 320000
+
+def load_profiles(path):
+    with open(path, "r") as f:
+        profiles = json.load(f)
+    for profile in profiles:
+        profile["payouts"] = {int(k): tuple(v) for k, v in profile["payouts"].items()}
+        profile["counts"] = {int(k): v for k, v in profile["counts"].items()}
+    return profiles
+
+def shared_candidates(legs, k, limit):
+    """
+    One enumeration of the best k-leg entries in Picks' ranking order (parlay odds for
+    2-3 legs, probability for 4+), as (combos, parlay_odds, prob) arrays. Every
+    profile's edges are a linear function of prob, so no profile changes this order.
+    """
+    if k <= 3:
+        pairs = list(islice(best_first_parlays(legs, k), limit))
+        combos = np.array([combo for combo, _ in pairs], dtype=np.int64).reshape(-1, k)
+        parlay_odds = np.array([odds for _, odds in pairs], dtype=np.int64)
+    else:
+        combos = np.array(top_entries(legs, k, limit), dtype=np.int64).reshape(-1, k)
+        parlay_odds = None
+    prob = np.ones(len(combos))
+    for position in range(k):
+        prob = prob * legs["prob"][combos[:, position]]
+    return combos, parlay_odds, prob
+
+def greedy_select(combos, count, max_individual, max_pair=None):
+    """
+    Picks' select_parlays / select_3_leg_parlays over integer leg ids with array
+    counters: walks the candidates in order and keeps each one that fits the caps.
+    Returns (chosen indices, whether the candidates ran out before `count`).
+    """
+    n = int(combos.max()) + 1 if len(combos) else 0
+    leg_use = np.zeros(n, dtype=np.int64)
+    pair_use = {}
+    chosen = []
+    k = combos.shape[1]
+    for index, combo in enumerate(combos.tolist()):
+        if any(leg_use[leg] >= max_individual for leg in combo):
+            continue
+        pairs = [(combo[a], combo[b]) for a in range(k) for b in range(a + 1, k)] if max_pair is not None else []
+        if any(pair_use.get(pair, 0) >= max_pair for pair in pairs):
+            continue
+        chosen.append(index)
+        leg_use[combo] += 1
+        for pair in pairs:
+            pair_use[pair] = pair_use.get(pair, 0) + 1
+        if len(chosen) == count:
+            return chosen, False
+    return chosen, True
+
+def evaluate_profile(legs, profile, candidates):
+    """Runs one profile's selection on the shared candidates; returns its entries per size and the sizes that ran short."""
+    results = {}
+    short = []
+    for k, count in profile["counts"].items():
+        combos, parlay_odds, prob = candidates[k]
+        implied_payout, vig_payout = profile["payouts"][k]
+        max_pair = profile.get("max_pair") if k >= 3 else None
+        if profile.get("selection", "greedy") == "portfolio":
+            edges = implied_payout * prob - 1
+            order = np.argsort(-edges, kind="stable")
+            portfolio = Portfolio(legs, combos[order], edges[order], profile["max_individual"], max_pair)
+            portfolio.fill(count)
+            ran_out = len(portfolio.chosen()) < count
+            chosen = [int(order[i]) for i in optimize(portfolio, count)]
+        else:
+            chosen, ran_out = greedy_select(combos, count, profile["max_individual"], max_pair)
+        if ran_out:
+            short.append(k)
+        entries = []
+        for i in chosen:
+            combo = combos[i].tolist()
+            odds = int(parlay_odds[i]) if parlay_odds is not None else parlay_odds_of(legs, combo)
+            entries.append(parlay_entry(legs, combo, odds, implied_payout, vig_payout))
+        results[k] = entries
+    return results, short
+
+def run_sweep(legs, profiles_file, output_prefix=""):
+    """
+    Evaluates every profile against one shared enumeration per entry size and writes
+    <prefix>picks_<name>.json for each. A size is only re-enumerated (4x larger, up to
+    max_pool) when some profile's caps exhaust its candidates.
+    """
+    profiles = load_profiles(profiles_file)
+    sizes = sorted({k for profile in profiles for k in profile["counts"]})
+    limits = {k: initial_pool for k in sizes}
+    candidates = {k: shared_candidates(legs, k, limits[k]) for k in sizes}
+
+    outputs = {}
+    for profile in profiles:
+        while True:
+            results, short = evaluate_profile(legs, profile, candidates)
+            # Grow only sizes whose pool was full; a smaller pool already holds every entry
+            grow = [k for k in short if len(candidates[k][0]) >= limits[k] and limits[k] < max_pool]
+            if not grow:
+                break
+            for k in grow:
+                limits[k] *= 4
+                candidates[k] = shared_candidates(legs, k, limits[k])
+        for k in short:
+            print(f"⚠️ Profile '{profile['name']}': only {len(results[k])} of {profile['counts'][k]} {k}-leg entries fit its caps")
+        outputs[profile["name"]] = [entry for k in profile["counts"] for entry in results[k]]
+
+    for name, parlays in outputs.items():
+        output_file_path = f"{output_prefix}picks_{name}.json"
+        with open(output_file_path, "w") as file:
+            json.dump({'parlays': parlays}, file, indent=4)
+        print(f"📊 Profile '{name}': {len(parlays)} entries saved to {output_file_path}")
+    return outputs
@@ -0,0 +1,198 @@
+import os
+import re
+import sys
+import json
+import fcntl
+import hashlib
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+from browser_service import connect_or_launch, warm_context_options
+
+# Learned allowlists, keyed by site version (relative to the repo root)
+root_dir = os.path.dirname(os.path.abspath(__file__))
+allowlist_file = os.path.join(root_dir, "p6_allowlist.json")
+
+# Held by the one process relearning the allowlist
+relearn_lock_file = os.path.join(root_dir, "p6_allowlist.lock")
+
+# Request types the allowlist decides on; documents always load and the rest stay blocked by type
+learned_types = {"script", "xhr", "fetch"}
+
+# Same type and analytics blocking the ScrapeP6 scripts apply
+blocked_types = {
+    "image", "stylesheet", "font", "media", "websocket",
+    "manifest", "other", "eventsource", "texttrack"
+}
+blocked_scripts = [
+    'google-analytics', 'googletagmanager', 'facebook', 'twitter',
+    'doubleclick', 'adsystem', 'amazon-adsystem', 'googlesyndication',
+    'hotjar', 'mixpanel', 'segment', 'amplitude'
+]
+
+# Build hashes and cache-busting ids in bundle paths change on every deploy
+hash_token = re.compile(r"[0-9a-f]{8,}|[0-9A-Za-z_-]{24,}")
+
+max_versions = 5
+
+def normalize_url(url):
+    """Reduces a request URL to host + path with query strings and build hashes stripped."""
+    parts = urlsplit(url)
+    return f"{parts.netloc}{hash_token.sub('*', parts.path)}"
+
+def read_allowlists():
+    try:
+        with open(allowlist_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"current": None, "versions": {}}
+
+def write_allowlists(data):
+    tmp_file = f"{allowlist_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_file, allowlist_file)
+
+def site_fingerprint(seen):
+    """Site version id: a hash of the normalized script/XHR URLs a good load made."""
+    return hashlib.sha1("\n".join(seen).encode("utf-8")).hexdigest()[:12]
+
+def load_version():
+    """
+    Returns the current site version's entry ("required" and "seen" URLs), or None if
+    nothing valid is learned. An entry whose URLs don't hash to its id is ignored.
+    """
+    data = read_allowlists()
+    current = data.get("current")
+    version = data.get("versions", {}).get(current)
+    if not version or site_fingerprint(version.get("seen", [])) != current:
+        return None
+    return version
+
+def load_allowlist():
+    """Returns the current site version's required URLs, or None if nothing valid is learned."""
+    version = load_version()
+    return set(version["required"]) if version else None
+
+def is_allowed(allowlist, url):
+    return normalize_url(url) in allowlist
+
+def invalidate_allowlist():
+    """Marks the current allowlist as broken so scrapers fall back until it is relearned."""
+    data = read_allowlists()
+    if data.get("current"):
+        data["current"] = None
+        write_allowlists(data)
+
+async def load_signature(browser, url, stat_label, blocked=(), seen=None):
+    """
+    Loads a Pick6 stat page with the given normalized URLs blocked and returns the
+    sorted "Less than" button labels, or None if the cards never rendered.
+    When `seen` is a list, every allowed script/XHR is recorded into it.
+    """
+    async def route_request(route):
+        request = route.request
+        if request.resource_type in blocked_types:
+            await route.abort()
+        elif request.resource_type == "script" and any(b in request.url.lower() for b in blocked_scripts):
+            await route.abort()
+        elif request.resource_type in learned_types and normalize_url(request.url) in blocked:
+            await route.abort()
+        else:
+            if seen is not None and request.resource_type in learned_types:
+                seen.append(normalize_url(request.url))
+            await route.continue_()
+
+    context = await browser.new_context(
+        viewport={'width': 800, 'height': 600},
+        ignore_https_errors=True,
+        **warm_context_options()
+    )
+    try:
+        page = await context.new_page()
+        await page.route("**/*", route_request)
+        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        await page.wait_for_selector(f'text="{stat_label}"', timeout=5000)
+        await page.wait_for_selector('[data-testid="playerStatCard"]', timeout=15000)
+        await page.wait_for_timeout(3000)
+        labels = await page.evaluate("""
+            () => Array.from(document.querySelectorAll('button[aria-label*="for Less than"]'))
+                .map(btn => btn.getAttribute('aria-label'))
+                .filter(label => label)
+        """)
+        return sorted(labels) if labels else None
+    except Exception:
+        return None
+    finally:
+        await context.close()
+
+async def learn_allowlist(p, browser_args, url, stat_label):
+    """
+    Learning mode: records every script/XHR of a known-good load, then drops whole
+    hosts and single URLs one at a time, keeping only what the card extraction needs
+    to produce the same players. Saves the result as the current site version.
+    """
+    browser = await connect_or_launch(p, browser_args)
+    try:
+        seen = []
+        baseline = await load_signature(browser, url, stat_label, seen=seen)
+        if baseline is None:
+            print(f"⚠️ Allowlist learning: {stat_label} didn't load, nothing learned")
+            return None
+        seen = sorted(set(seen))
+        print(f"🧪 Allowlist learning: {len(seen)} scripts/XHRs recorded on {stat_label}")
+
+        async def still_works(blocked):
+            return await load_signature(browser, url, stat_label, blocked=blocked) == baseline
+
+        removed = set()
+        hosts = sorted({entry.split("/", 1)[0] for entry in seen})
+        for host in hosts:
+            group = {entry for entry in seen if entry.split("/", 1)[0] == host}
+            if await still_works(removed | group):
+                removed |= group
+        for entry in seen:
+            if entry not in removed and await still_works(removed | {entry}):
+                removed.add(entry)
+
+        required = sorted(set(seen) - removed)
+        version = site_fingerprint(seen)
+        data = read_allowlists()
+        data["versions"][version] = {
+            "required": required,
+            "seen": seen,
+            "learned_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        for stale in sorted(data["versions"], key=lambda v: data["versions"][v]["learned_at"])[:-max_versions]:
+            del data["versions"][stale]
+        data["current"] = version
+        write_allowlists(data)
+
+        print(f"✅ Allowlist learned for site version {version}: {len(required)} of {len(seen)} requests needed")
+        return set(required)
+    finally:
+        await browser.close()
+
+@contextmanager
+def relearn_lock():
+    """Yields True to the one process allowed to relearn, False if another already is."""
+    handle = open(relearn_lock_file, "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        handle.close()
+
+def start_relearn(script):
+    """
+    Relearns in a separate process running `script --relearn-allowlist`, so the scrape
+    and everything downstream of it don't wait on its page loads.
+    """
+    print("🧪 Relearning the allowlist in the background")
+    return subprocess.Popen([sys.executable, script, "--relearn-allowlist"], cwd=root_dir, start_new_session=True)
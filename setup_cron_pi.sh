@@ -42,6 +42,30 @@ fi
 # Add the new cron job
 (crontab -l 2>/dev/null; echo "$CRON_JOB") | crontab -
 
+# Optionally keep a warm WebKit browser running between runs (./setup_cron_pi.sh --with-browser-service)
+SERVICE_SCRIPT="$SCRIPT_DIR/browser_service.py"
+if [ "$1" == "--with-browser-service" ]; then
+    echo ""
+    echo "🔥 Setting up warm browser service (starts on boot)..."
+    SERVICE_JOB="@reboot cd $SCRIPT_DIR && /usr/bin/python3 $SERVICE_SCRIPT >> $SCRIPT_DIR/browser_service.log 2>&1"
+    crontab -l 2>/dev/null | grep -v "$SERVICE_SCRIPT" | crontab -
+    (crontab -l 2>/dev/null; echo "$SERVICE_JOB") | crontab -
+    nohup /usr/bin/python3 "$SERVICE_SCRIPT" >> "$SCRIPT_DIR/browser_service.log" 2>&1 &
+fi
+
+# Or keep the pipeline resident instead of cold-starting it every 30 minutes (./setup_cron_pi.sh --daemon)
+# The daemon refreshes each sport on a game-time cadence and starts the browser service itself
+DAEMON_SCRIPT="$SCRIPT_DIR/daemon.py"
+if [ "$1" == "--daemon" ]; then
+    echo ""
+    echo "🕒 Replacing the cron job with the resident scheduler daemon (starts on boot)..."
+    DAEMON_JOB="@reboot cd $SCRIPT_DIR && /usr/bin/python3 $DAEMON_SCRIPT >> $SCRIPT_DIR/daemon.log 2>&1"
+    crontab -l 2>/dev/null | grep -v "$PYTHON_SCRIPT" | grep -v "$DAEMON_SCRIPT" | crontab -
+    (crontab -l 2>/dev/null; echo "$DAEMON_JOB") | crontab -
+    nohup /usr/bin/python3 "$DAEMON_SCRIPT" >> "$SCRIPT_DIR/daemon.log" 2>&1 &
+    echo "   • Reload code: kill -HUP \$(cat $SCRIPT_DIR/daemon.lock)"
+fi
+
 echo ""
 echo "✅ Setup complete!"
 echo ""
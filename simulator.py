@@ -0,0 +1,145 @@
+import os
+import json
+from statistics import NormalDist
+import numpy as np
+from parlay_engine import stat_key, stat_components
+
+# Share of each leg's latent variance that comes from a common factor.
+# game: pace and game script, shared by every leg in the game
+# team: only used when a player -> team lookup is passed in
+# stat: the same stat component in the same game (a high-scoring game lifts every points line)
+# player: the same player across stats with overlapping components (points and pra)
+default_correlation = {"game": 0.08, "team": 0.05, "stat": 0.04, "player": 0.30}
+correlation_model = json.loads(os.getenv("PICKS_SIM_CORRELATION", "null")) or default_correlation
+
+# Draws per entry estimate; rounded up to whole 64-draw words
+sim_draws = int(os.getenv("PICKS_SIM_DRAWS", "20000"))
+sim_seed = int(os.getenv("PICKS_SIM_SEED", "6"))
+
+# Draws simulated at once and entries scored at once; together they bound peak memory
+chunk_draws = 8192
+entry_block = 2048
+
+def leg_factors(selections, model=None, teams=None):
+    """
+    Builds the Gaussian copula for a slate: a (legs, factors) loading matrix and each
+    leg's idiosyncratic scale, so a leg's latent value is loadings @ factors + scale * noise
+    with unit variance. Unders load negatively, so an over and an under on the same
+    game pull apart while two overs move together.
+    """
+    model = correlation_model if model is None else model
+    keys = {}
+    rows = []
+    for selection in selections:
+        parts = selection.split(", ")
+        player, game = parts[0], parts[3] if len(parts) > 3 else ""
+        stat = stat_key(selection)
+        sign = -1.0 if parts[1].lower().startswith("under") else 1.0
+        components = sorted(stat_components.get(stat, {stat}))
+        loads = []
+        if model.get("game"):
+            loads.append((("game", game), model["game"]))
+        if model.get("team") and teams and player in teams:
+            loads.append((("team", teams[player]), model["team"]))
+        if model.get("stat"):
+            for component in components:
+                loads.append((("stat", game, component), model["stat"] / len(components)))
+        if model.get("player"):
+            for component in components:
+                loads.append((("player", player, component), model["player"] / len(components)))
+        rows.append([(keys.setdefault(key, len(keys)), sign * np.sqrt(weight)) for key, weight in loads])
+
+    loadings = np.zeros((len(selections), len(keys)))
+    for leg, row in enumerate(rows):
+        for factor, load in row:
+            loadings[leg, factor] += load
+    shared = (loadings ** 2).sum(axis=1)
+    if np.any(shared >= 1):
+        raise ValueError("Correlation weights leave no room for leg-specific noise; lower the model weights")
+    return loadings, np.sqrt(1 - shared)
+
+def leg_thresholds(prob):
+    """Latent cutoffs so each leg still hits with exactly its own implied probability."""
+    normal = NormalDist()
+    return np.array([normal.inv_cdf(min(max(float(p), 1e-12), 1 - 1e-12)) for p in prob])
+
+def sample_hits(legs, draws=None, seed=None, model=None, teams=None):
+    """
+    Yields the slate's correlated outcomes chunk by chunk as bit-packed words: an
+    (legs, chunk_draws // 64) uint64 array where bit j of a leg's row says whether it
+    hit in draw j. Each chunk has its own seed derived from (seed, chunk index), so a
+    run is reproducible and memory never holds more than one chunk.
+    """
+    draws = sim_draws if draws is None else draws
+    seed = sim_seed if seed is None else seed
+    loadings, scale = leg_factors(legs["selections"], model, teams)
+    thresholds = leg_thresholds(legs["prob"])
+    chunks = -(-draws // chunk_draws)
+    for index in range(chunks):
+        size = min(chunk_draws, draws - index * chunk_draws)
+        size = -(-size // 64) * 64
+        rng = np.random.default_rng([seed, index])
+        factors = rng.standard_normal((size, loadings.shape[1]))
+        latent = factors @ loadings.T + rng.standard_normal((size, len(scale))) * scale
+        hits = latent < thresholds
+        yield np.ascontiguousarray(np.packbits(hits.T, axis=1, bitorder="little")).view(np.uint64)
+
+def count_hits(packed, combos):
+    """
+    Per-entry histogram of how many legs hit, over one chunk of packed draws, as an
+    (entries, k + 1) array. Hit counts are kept as bit-sliced counters, so each leg
+    costs a few word-wide AND/XOR ops and popcounts cover 64 draws at a time.
+    """
+    k = combos.shape[1]
+    width = max(1, k.bit_length())
+    counters = [np.zeros((len(combos), packed.shape[1]), dtype=np.uint64) for _ in range(width)]
+    for position in range(k):
+        carry = packed[combos[:, position]]
+        for bit in range(width):
+            counters[bit], carry = counters[bit] ^ carry, counters[bit] & carry
+    histogram = np.empty((len(combos), k + 1), dtype=np.int64)
+    for hits in range(k + 1):
+        exact = np.full_like(counters[0], np.iinfo(np.uint64).max)
+        for bit in range(width):
+            exact &= counters[bit] if hits >> bit & 1 else ~counters[bit]
+        histogram[:, hits] = np.bitwise_count(exact).sum(axis=1, dtype=np.int64)
+    return histogram
+
+def simulate_entries(legs, combos, ladder=None, draws=None, seed=None, model=None, teams=None):
+    """
+    Scores every k-leg entry against the same correlated draws. Returns the hit-count
+    distribution (entries, k + 1), the all-hit rate and, given a {legs hit: payout}
+    ladder, the expected payout multiple.
+    """
+    combos = np.asarray(combos, dtype=np.int64)
+    k = combos.shape[1]
+    histogram = np.zeros((len(combos), k + 1), dtype=np.int64)
+    total = 0
+    for packed in sample_hits(legs, draws, seed, model, teams):
+        total += packed.shape[1] * 64
+        for start in range(0, len(combos), entry_block):
+            block = combos[start:start + entry_block]
+            histogram[start:start + len(block)] += count_hits(packed, block)
+    distribution = histogram / max(total, 1)
+    result = {"distribution": distribution, "hit_rate": distribution[:, k], "draws": total}
+    if ladder:
+        payouts = np.array([float(ladder.get(hits, 0)) for hits in range(k + 1)])
+        result["ev"] = distribution @ payouts
+    return result
+
+def annotate_entries(legs, entries, payouts, draws=None, seed=None):
+    """
+    Adds simulated hit rate and edge to picks.json entries in place. `payouts` maps
+    entry size to the all-hit payout; all sizes are scored against the same draws.
+    """
+    leg_ids = {selection: i for i, selection in enumerate(legs["selections"])}
+    by_size = {}
+    for entry in entries:
+        by_size.setdefault(len(entry['parlay']), []).append(entry)
+    for size, group in by_size.items():
+        combos = np.array([[leg_ids[sel] for sel in entry['parlay']] for entry in group])
+        result = simulate_entries(legs, combos, {size: payouts[size]}, draws, seed)
+        for entry, hit_rate, ev in zip(group, result["hit_rate"].tolist(), result["ev"].tolist()):
+            entry['sim_hit_rate'] = f"{hit_rate * 100:.2f}%"
+            entry['sim_edge'] = f"{(ev - 1) * 100:.2f}%"
+    return entries
@@ -0,0 +1,85 @@
+import os
+import json
+import gzip
+import time
+import random
+from datetime import datetime
+
+# Total size cap for each sport's snapshot folder (oldest snapshots are dropped first)
+snapshot_budget = int(os.getenv("P6_SNAPSHOT_BUDGET", str(5 * 1024 * 1024)))
+
+# Fraction of healthy scrapes kept anyway, so there's always a recent known-good page
+sample_rate = float(os.getenv("P6_SNAPSHOT_RATE", "0.02"))
+
+# A stat whose options drop below this share of the last run counts as an anomaly
+anomaly_ratio = 0.5
+
+def snapshot_reason(failed, option_count, previous_count):
+    """
+    Decides whether a scrape is worth keeping the HTML for.
+    Returns "failure", "anomaly", "sample" or None for the normal, no-I/O path.
+    """
+    if failed:
+        return "failure"
+    if previous_count and option_count < previous_count * anomaly_ratio:
+        return "anomaly"
+    if random.random() < sample_rate:
+        return "sample"
+    return None
+
+def save_snapshot(snapshot_dir, stat_name, reason, html, extra=None):
+    """
+    Writes a gzip-compressed snapshot of the page and trims the folder back under
+    the size budget. Snapshot names sort oldest-first, which makes the folder a ring buffer.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    captured_at = time.time()
+    stamp = datetime.fromtimestamp(captured_at).strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(snapshot_dir, f"{stamp}_{stat_name}_{reason}.json.gz")
+
+    snapshot = {
+        "stat": stat_name,
+        "reason": reason,
+        "captured_at": captured_at,
+        "html": html,
+    }
+    snapshot.update(extra or {})
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+        enforce_budget(snapshot_dir)
+    except OSError as e:
+        # Debug snapshots must never break a scrape
+        print(f"⚠️ {stat_name}: Couldn't save snapshot - {e}")
+        return None
+    print(f"📸 {stat_name}: Saved {reason} snapshot to {path}")
+    return path
+
+def list_snapshots(snapshot_dir):
+    """Returns snapshot paths, oldest first."""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(
+        os.path.join(snapshot_dir, name)
+        for name in os.listdir(snapshot_dir)
+        if name.endswith(".json.gz")
+    )
+
+def load_snapshot(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+def enforce_budget(snapshot_dir, budget=None):
+    """Deletes the oldest snapshots until the folder fits the budget, always keeping the newest."""
+    budget = snapshot_budget if budget is None else budget
+    snapshots = list_snapshots(snapshot_dir)
+    sizes = {path: os.path.getsize(path) for path in snapshots}
+    total = sum(sizes.values())
+    for path in snapshots[:-1]:
+        if total <= budget:
+            break
+        total -= sizes[path]
+        os.remove(path)
@@ -1,8 +1,13 @@
 import json
 import os
+import sys
 from datetime import datetime
 import pytz
 
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from freshness import load_json
+
 # Function to normalize the minus sign to a regular hyphen
 def normalize_minus_sign(odds):
     return odds.replace('−', '-').replace('âˆ’', '-').replace('\u00e2\u02c6\u2019', '-')
@@ -31,15 +36,13 @@ def process_category(category_name):
     lines_file   = f'wnba/lines/{category_name}_lines.json'
     options_file = f'wnba/options/{category_name}_options.json'
     
-    if not os.path.exists(lines_file) or not os.path.exists(options_file):
+    # Stale copies are used within the staleness budget; beyond it the stat is skipped
+    lines_data = load_json(lines_file)
+    options_data = load_json(options_file)
+    if lines_data is None or options_data is None:
         print(f"Skipping {category_name}: Missing data file.")
         return []
     
-    with open(lines_file,   'r', encoding='utf-8') as f:
-        lines_data = json.load(f)
-    with open(options_file, 'r', encoding='utf-8') as f:
-        options_data = json.load(f)
-    
     selections = []
     for player in lines_data:
         if player['name'] in options_data:
@@ -78,21 +81,27 @@ wnba_stat_types = [
     'assists'
 ]
 
-all_selections = []
-for category in wnba_stat_types:
-    try:
-        all_selections.extend(process_category(category))
-    except Exception as e:
-        print(f"Error processing category '{category}': {e}")
+def save_selections(all_selections):
+    # Also sort the full list by odds embedded in the string
+    all_selections.sort(key=lambda s: int(normalize_minus_sign(s.split(", ")[2])))
+
+    # Ensure the 'wnba/selections' folder exists
+    os.makedirs('wnba/selections', exist_ok=True)
 
-# Also sort the full list by odds embedded in the string
-all_selections.sort(key=lambda s: int(normalize_minus_sign(s.split(", ")[2])))
+    # Write selections to JSON
+    with open('wnba/selections/selections.json', 'w', encoding='utf-8') as f:
+        json.dump(all_selections, f, indent=4, ensure_ascii=False)
 
-# Ensure the 'wnba/selections' folder exists
-os.makedirs('wnba/selections', exist_ok=True)
+    print("All WNBA selections written to wnba/selections/selections.json.")
 
-# Write selections to JSON
-with open('wnba/selections/selections.json', 'w', encoding='utf-8') as f:
-    json.dump(all_selections, f, indent=4, ensure_ascii=False)
+def main():
+    all_selections = []
+    for category in wnba_stat_types:
+        try:
+            all_selections.extend(process_category(category))
+        except Exception as e:
+            print(f"Error processing category '{category}': {e}")
+    save_selections(all_selections)
 
-print("All WNBA selections written to wnba/selections/selections.json.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import shutil
+import sqlite3
+import tempfile
+import threading
+import subprocess
+from freshness import mark_fresh, mark_failed
+from snapshot_store import list_snapshots, enforce_budget
+
+root_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Where scrape tasks are queued: "redis://host:6379/0" for workers on several machines, or
+# "sqlite:///path/to/queue.db" for worker processes on this machine only. Unset keeps every
+# scrape inside the local pipeline.
+queue_url = os.getenv("PIPELINE_QUEUE", "")
+
+# A claimed task goes back on the queue if its worker stops renewing it for this long
+lease_seconds = int(os.getenv("PIPELINE_QUEUE_LEASE", "120"))
+
+# Claims (including expired leases) before a task is given up on
+max_attempts = 3
+
+# How long the coordinator waits on one task, and how often it checks
+task_timeout = int(os.getenv("PIPELINE_QUEUE_TIMEOUT", "900"))
+poll_interval = 0.5
+
+# Worker threads the coordinator runs itself, so a single node still makes progress
+local_workers = int(os.getenv("PIPELINE_QUEUE_LOCAL_WORKERS", "2"))
+
+# Finished tasks are dropped after a day
+retention_seconds = 24 * 60 * 60
+
+def new_task(sport, source, stat):
+    return {
+        "id": uuid.uuid4().hex,
+        "sport": sport,
+        "source": source,
+        "stat": stat,
+        "status": "queued",
+        "attempts": 0,
+        "worker": None,
+        "lease_until": 0.0,
+        "result": None,
+        "error": None,
+        "created": time.time(),
+    }
+
+class SqliteQueue:
+    """
+    Task queue in one SQLite file. Every operation opens its own connection, so threads
+    and processes can share it, but only on one host: WAL mode relies on shared memory,
+    which network filesystems don't provide. Use Redis to spread workers across machines.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self.connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY, sport TEXT, source TEXT, stat TEXT, status TEXT,
+                    attempts INTEGER, worker TEXT, lease_until REAL, result TEXT, error TEXT, created REAL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, created)")
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def transaction(self, db):
+        db.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, task):
+        with self.connect() as db:
+            db.execute("DELETE FROM tasks WHERE status IN ('done', 'failed') AND created < ?", (time.time() - retention_seconds,))
+            db.execute(
+                "INSERT INTO tasks VALUES (:id, :sport, :source, :stat, :status, :attempts, :worker, :lease_until, :result, :error, :created)",
+                task,
+            )
+        return task["id"]
+
+    def claim(self, worker):
+        """Leases the oldest queued task to `worker`, first re-queuing tasks whose lease ran out."""
+        now = time.time()
+        db = self.connect()
+        try:
+            self.transaction(db)
+            db.execute(
+                """UPDATE tasks SET attempts = attempts + 1, worker = NULL, error = 'lease expired',
+                   status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END
+                   WHERE status = 'claimed' AND lease_until < ?""",
+                (max_attempts, now),
+            )
+            row = db.execute("SELECT id FROM tasks WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE tasks SET status = 'claimed', worker = ?, lease_until = ? WHERE id = ?",
+                    (worker, now + lease_seconds, row[0]),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+        return self.get(row[0]) if row is not None else None
+
+    def renew(self, task_id, worker):
+        with self.connect() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'claimed'",
+                (time.time() + lease_seconds, task_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id, worker, result):
+        """Stores the result, unless the lease was lost and the task handed to someone else."""
+        with self.connect() as db:
+            db.execute(
+                "UPDATE tasks SET status = 'done', result = ? WHERE id = ? AND worker = ? AND status = 'claimed'",
+                (json.dumps(result), task_id, worker),
+            )
+
+    def fail(self, task_id, worker, error, result=None):
+        """Re-queues the task (or gives up on it), keeping what the failed attempt reported."""
+        with self.connect() as db:
+            db.execute(
+                """UPDATE tasks SET attempts = attempts + 1, worker = NULL, error = ?, result = ?,
+                   status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END
+                   WHERE id = ? AND worker = ? AND status = 'claimed'""",
+                (error, json.dumps(result) if result is not None else None, max_attempts, task_id, worker),
+            )
+
+    def cancel(self, task_id):
+        """Gives up on an unfinished task, so no worker picks it up (or stores a result) later."""
+        with self.connect() as db:
+            db.execute(
+                "UPDATE tasks SET status = 'failed', error = 'cancelled by coordinator' WHERE id = ? AND status IN ('queued', 'claimed')",
+                (task_id,),
+            )
+
+    def get(self, task_id):
+        with self.connect() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        task = dict(row)
+        task["result"] = json.loads(task["result"]) if task["result"] else None
+        return task
+
+class RedisQueue:
+    """
+    The same queue on a Redis-compatible server: a list of queued ids, a sorted set of
+    lease deadlines and one hash per task. Needs the optional `redis` package.
+    """
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = "toppicks:queue"
+        # Pop, lease and mark claimed in one step, so a worker dying in between can't lose the task.
+        # Ids whose task isn't queued anymore (cancelled or expired) are skipped.
+        self.claim_script = self.client.register_script("""
+            while true do
+                local task_id = redis.call('LPOP', KEYS[1])
+                if not task_id then
+                    return nil
+                end
+                if redis.call('HGET', ARGV[3] .. task_id, 'status') == '"queued"' then
+                    redis.call('ZADD', KEYS[2], ARGV[1], task_id)
+                    redis.call('HSET', ARGV[3] .. task_id, 'status', '"claimed"', 'worker', ARGV[2], 'lease_until', ARGV[1])
+                    return task_id
+                end
+            end
+        """)
+        # Cancel in one step too, so a worker can't claim the task between the check and the update
+        self.cancel_script = self.client.register_script("""
+            local status = redis.call('HGET', KEYS[3], 'status')
+            if status ~= '"queued"' and status ~= '"claimed"' then
+                return 0
+            end
+            redis.call('LREM', KEYS[1], 0, ARGV[1])
+            redis.call('ZREM', KEYS[2], ARGV[1])
+            redis.call('HSET', KEYS[3], 'status', '"failed"', 'error', ARGV[2])
+            return 1
+        """)
+
+    def key(self, *parts):
+        return ":".join((self.prefix,) + parts)
+
+    def save(self, task):
+        fields = {name: json.dumps(value) for name, value in task.items()}
+        self.client.hset(self.key("task", task["id"]), mapping=fields)
+        self.client.expire(self.key("task", task["id"]), retention_seconds)
+
+    def enqueue(self, task):
+        self.save(task)
+        self.client.rpush(self.key("queued"), task["id"])
+        return task["id"]
+
+    def requeue_expired(self):
+        for task_id in self.client.zrangebyscore(self.key("leases"), "-inf", time.time()):
+            # Only the client that removes the lease re-queues the task
+            if self.client.zrem(self.key("leases"), task_id):
+                task = self.get(task_id)
+                if task is not None:
+                    self.retry(task, "lease expired")
+
+    def retry(self, task, error, result=None):
+        task.update(attempts=task["attempts"] + 1, worker=None, error=error)
+        if result is not None:
+            task["result"] = result
+        task["status"] = "failed" if task["attempts"] >= max_attempts else "queued"
+        self.save(task)
+        if task["status"] == "queued":
+            self.client.rpush(self.key("queued"), task["id"])
+
+    def claim(self, worker):
+        self.requeue_expired()
+        task_id = self.claim_script(
+            keys=[self.key("queued"), self.key("leases")],
+            args=[repr(time.time() + lease_seconds), json.dumps(worker), self.key("task", "")],
+        )
+        return self.get(task_id) if task_id is not None else None
+
+    def holds(self, task_id, worker):
+        task = self.get(task_id)
+        return task is not None and task["status"] == "claimed" and task["worker"] == worker
+
+    def renew(self, task_id, worker):
+        if not self.holds(task_id, worker):
+            return False
+        self.client.zadd(self.key("leases"), {task_id: time.time() + lease_seconds}, xx=True)
+        return True
+
+    def complete(self, task_id, worker, result):
+        if self.holds(task_id, worker) and self.client.zrem(self.key("leases"), task_id):
+            task = self.get(task_id)
+            task.update(status="done", result=result)
+            self.save(task)
+
+    def fail(self, task_id, worker, error, result=None):
+        if self.holds(task_id, worker) and self.client.zrem(self.key("leases"), task_id):
+            self.retry(self.get(task_id), error, result)
+
+    def cancel(self, task_id):
+        self.cancel_script(
+            keys=[self.key("queued"), self.key("leases"), self.key("task", task_id)],
+            args=[task_id, json.dumps("cancelled by coordinator")],
+        )
+
+    def get(self, task_id):
+        fields = self.client.hgetall(self.key("task", task_id))
+        return {name: json.loads(value) for name, value in fields.items()} or None
+
+def open_queue(url=None):
+    url = url or queue_url
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisQueue(url)
+    if url.startswith("sqlite:///"):
+        return SqliteQueue(url[len("sqlite://"):])
+    if url.startswith("sqlite:"):
+        return SqliteQueue(url[len("sqlite:"):])
+    raise ValueError(f"Unsupported PIPELINE_QUEUE '{url}' (use sqlite:///path or redis://host:port/db)")
+
+def task_output(sport, source, stat):
+    """The file a task's scrape writes, relative to the working directory."""
+    if source == "dk":
+        return f"{sport}/data/{stat}.json"
+    return f"{sport}/options/{stat}_options.json"
+
+def snapshot_folder(sport):
+    """Where a sport's Pick6 debug snapshots go, relative to the working directory."""
+    return f"{sport}/data_p6/snapshots"
+
+class TaskFailed(RuntimeError):
+    """A task's scrape failed; `result` still carries what the coordinator needs to know."""
+
+    def __init__(self, message, result):
+        super().__init__(message)
+        self.result = result
+
+def run_task_here(sport, source, stat):
+    """
+    Child side of execute_task: scrapes one stat into the current (scratch) directory
+    and writes status.json with the Pick6 locked players and whether the learned
+    allowlist broke, even when the scrape fails.
+    """
+    from pipeline import sport_module
+    status = {"value": None, "allowlist_failed": False}
+    try:
+        if source == "dk":
+            dk = sport_module(sport, "ScrapeDK")
+            if not dk.fetch_and_save_json(dk.urls[stat], f"{stat}.json"):
+                sys.exit("DraftKings fetch failed")
+        else:
+            p6 = sport_module(sport, "ScrapeP6")
+            label, url = p6.urls[stat]
+            try:
+                locked = p6.scrape_and_save(stat, label, url)
+            finally:
+                status["allowlist_failed"] = p6.allowlist_failed
+            if locked is None:
+                sys.exit(f"{label} didn't load")
+            status["value"] = sorted(locked)
+    finally:
+        with open("status.json", "w") as f:
+            json.dump(status, f)
+
+def read_status(scratch):
+    try:
+        with open(os.path.join(scratch, "status.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"value": None, "allowlist_failed": False}
+
+def keep_snapshots(scratch, sport):
+    """Moves the scrape's debug snapshots out of the scratch directory into this node's tree."""
+    folder = snapshot_folder(sport)
+    source = os.path.join(scratch, folder)
+    snapshots = list_snapshots(source)
+    if not snapshots:
+        return
+    target = os.path.join(root_dir, folder)
+    os.makedirs(target, exist_ok=True)
+    for path in snapshots:
+        shutil.move(path, os.path.join(target, os.path.basename(path)))
+    enforce_budget(target)
+
+def execute_task(task):
+    """
+    Runs one scrape with this node's copy of the sport scripts, in a child process
+    working in a private scratch directory, and returns what the coordinator needs:
+    the written file's contents and, for Pick6, the locked players and allowlist state.
+    Nothing is written into a run; run_remote does that on the coordinator. Debug
+    snapshots are kept in this node's tree, failed scrapes' included.
+    """
+    sport, source, stat = task["sport"], task["source"], task["stat"]
+    scratch = tempfile.mkdtemp(prefix="toppicks-task-")
+    try:
+        for folder in ("data", "options", "data_p6"):
+            os.makedirs(os.path.join(scratch, sport, folder))
+        child = subprocess.run(
+            [sys.executable, os.path.join(root_dir, "work_queue.py"), "--task", sport, source, stat],
+            cwd=scratch, stderr=subprocess.PIPE, text=True,
+        )
+        status = read_status(scratch)
+        if child.returncode != 0:
+            lines = child.stderr.strip().splitlines()
+            raise TaskFailed(lines[-1] if lines else f"exit status {child.returncode}", status)
+        path = task_output(sport, source, stat)
+        with open(os.path.join(scratch, path), "r", encoding="utf-8") as f:
+            content = f.read()
+        return {"files": {path: content}, **status}
+    finally:
+        try:
+            keep_snapshots(scratch, sport)
+        except OSError as e:
+            # Debug snapshots must never break a scrape
+            print(f"⚠️ {sport} {stat}: Couldn't keep snapshots - {e}")
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def work(queue, worker, stop_event=None, exit_when_idle=False):
+    """Claims and runs tasks until stopped, renewing each lease while its scrape runs."""
+    while stop_event is None or not stop_event.is_set():
+        task = queue.claim(worker)
+        if task is None:
+            if exit_when_idle:
+                return
+            time.sleep(poll_interval)
+            continue
+        done = threading.Event()
+
+        def renew_lease():
+            while not done.wait(lease_seconds / 3):
+                if not queue.renew(task["id"], worker):
+                    return
+
+        threading.Thread(target=renew_lease, daemon=True).start()
+        name = f"{task['sport']} {task['source']} {task['stat']}"
+        try:
+            result = execute_task(task)
+        except TaskFailed as e:
+            print(f"❌ {worker}: {name} failed - {e}")
+            queue.fail(task["id"], worker, str(e), e.result)
+        except Exception as e:
+            print(f"❌ {worker}: {name} failed - {e}")
+            queue.fail(task["id"], worker, str(e))
+        else:
+            queue.complete(task["id"], worker, result)
+            print(f"✅ {worker}: {name}")
+        finally:
+            done.set()
+
+# The coordinator's own queue connection and worker threads, started on first use
+shared_queue = None
+local_threads = []
+queue_lock = threading.Lock()
+
+def get_queue():
+    global shared_queue
+    with queue_lock:
+        if shared_queue is None:
+            shared_queue = open_queue()
+            for index in range(local_workers):
+                worker = f"{socket.gethostname()}:{os.getpid()}:local{index}"
+                thread = threading.Thread(target=work, args=(shared_queue, worker), daemon=True)
+                thread.start()
+                local_threads.append(thread)
+        return shared_queue
+
+def carry_allowlist_failure(sport, source, stat, task):
+    """
+    A worker's scrape that broke under the learned allowlist drops it here too, so this
+    run falls back to default blocking and relearns it in finish_scraping.
+    """
+    if source != "p6" or not (task["result"] or {}).get("allowlist_failed"):
+        return
+    from pipeline import sport_module
+    p6 = sport_module(sport, "ScrapeP6")
+    p6.drop_allowlist(p6.urls[stat][0], "Extraction failed with the learned allowlist on a queue worker")
+
+def run_remote(sport, source, stat):
+    """
+    Queues one scrape for whichever node claims it first, waits for it and writes its
+    file into this run's tree. Returns the task's value (locked players for Pick6).
+    """
+    queue = get_queue()
+    task_id = queue.enqueue(new_task(sport, source, stat))
+    deadline = time.time() + task_timeout
+    while True:
+        task = queue.get(task_id)
+        if task["status"] == "done":
+            break
+        error = None
+        if task["status"] == "failed":
+            error = RuntimeError(f"{sport} {source} {stat} failed after {task['attempts']} attempts: {task['error']}")
+        elif time.time() > deadline:
+            error = TimeoutError(f"{sport} {source} {stat} wasn't finished within {task_timeout}s")
+        if error is not None:
+            # Nobody is waiting for it anymore; this run keeps serving its last good copy
+            queue.cancel(task_id)
+            carry_allowlist_failure(sport, source, stat, task)
+            mark_failed(task_output(sport, source, stat), error)
+            raise error
+        time.sleep(poll_interval)
+    carry_allowlist_failure(sport, source, stat, task)
+    for path, content in task["result"]["files"].items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        mark_fresh(path)
+    return task["result"]["value"]
+
+def main():
+    """Runs a standalone worker on this node: python work_queue.py [--once]"""
+    if sys.argv[1:2] == ["--task"]:
+        run_task_here(*sys.argv[2:5])
+        return
+    if not queue_url:
+        print("❌ Set PIPELINE_QUEUE to the coordinator's queue (sqlite:///path or redis://host:port/db)")
+        sys.exit(1)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"👷 Worker {worker} serving {queue_url}")
+    work(open_queue(), worker, exit_when_idle="--once" in sys.argv)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import shutil
+from datetime import datetime
+from contextlib import contextmanager
+
+root_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Every run's workspace, and the symlink pointing at the newest completed one
+runs_dir = os.path.join(root_dir, "runs")
+published_link = os.path.join(root_dir, "published")
+
+# Completed, unpublished workspaces kept around for debugging
+keep_runs = int(os.getenv("PIPELINE_KEEP_RUNS", "3"))
+
+# Folders every sport's scripts write into (relative to the working directory)
+sport_dirs = ["data", "lines", "options", "selections"]
+
+# NBA's scripts write at the repo root: its folders and the shared top-level outputs
+root_outputs = ["picks.json", "leaderboard.json", "generated_parlays.json", "parlay_builder_data.json"]
+
+# Written into a workspace once its run has finished, published or not
+done_marker = ".done"
+
+def published_dir():
+    """The published workspace, or None before the first published run."""
+    if not os.path.islink(published_link):
+        return None
+    target = os.path.join(root_dir, os.readlink(published_link))
+    return target if os.path.isdir(target) else None
+
+def new_run():
+    """A fresh runs/<id> directory. Ids sort by start time, so later ids are newer runs."""
+    os.makedirs(runs_dir, exist_ok=True)
+    run_id = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}"
+    run_dir = os.path.join(runs_dir, run_id)
+    os.makedirs(run_dir)
+    return run_dir
+
+def ignore_for_seed(directory, names):
+    return {name for name in names if name.endswith(".py") or name in ("__pycache__", "snapshots")}
+
+def published_sports(source):
+    """Sport folders in a published workspace."""
+    return {
+        name for name in os.listdir(source)
+        if any(os.path.isdir(os.path.join(source, name, folder)) for folder in sport_dirs)
+    }
+
+def seed(run_dir, sports):
+    """
+    Copies the last published outputs (or the repo's, before anything was published)
+    into the new workspace, so steps that fail or are skipped keep serving last run's
+    files. Every sport is carried over, not only the ones this run refreshes, since the
+    workspace replaces the whole published tree. Copies rather than hardlinks, since
+    the scripts rewrite files in place.
+    """
+    published = published_dir()
+    source = published or root_dir
+    carried = set(sports) | (published_sports(published) if published else set())
+    for sport in sorted(carried):
+        sport_source = os.path.join(source, sport)
+        if os.path.isdir(sport_source):
+            shutil.copytree(sport_source, os.path.join(run_dir, sport), ignore=ignore_for_seed, dirs_exist_ok=True)
+        for folder in sport_dirs:
+            os.makedirs(os.path.join(run_dir, sport, folder), exist_ok=True)
+    # NBA's folders (cross-sport ranking reads its selections) and the top-level outputs
+    for folder in sport_dirs:
+        if os.path.isdir(os.path.join(source, folder)):
+            shutil.copytree(os.path.join(source, folder), os.path.join(run_dir, folder), dirs_exist_ok=True)
+    for name in root_outputs:
+        if os.path.isfile(os.path.join(source, name)):
+            shutil.copy2(os.path.join(source, name), os.path.join(run_dir, name))
+
+def publish(run_dir):
+    """
+    Points `published` at the run with one atomic rename of a new symlink over the old
+    one. A run that finishes after a newer run was already published is left unpublished.
+    """
+    current = published_dir()
+    if current is not None and os.path.basename(current) > os.path.basename(run_dir):
+        print(f"⏭️ Not publishing {os.path.basename(run_dir)}: {os.path.basename(current)} is newer")
+        return False
+    dropped = published_sports(current) - published_sports(run_dir) if current is not None else set()
+    if dropped:
+        print(f"⏭️ Not publishing {os.path.basename(run_dir)}: it would drop {', '.join(sorted(dropped))}")
+        return False
+    tmp_link = f"{published_link}.{os.getpid()}.tmp"
+    os.symlink(os.path.relpath(run_dir, root_dir), tmp_link)
+    os.replace(tmp_link, published_link)
+    print(f"📢 Published {os.path.relpath(run_dir, root_dir)}")
+    return True
+
+def prune_runs():
+    """Deletes finished workspaces beyond the newest `keep_runs`, never the published one or a run in progress."""
+    current = published_dir()
+    finished = sorted(
+        name for name in os.listdir(runs_dir)
+        if os.path.exists(os.path.join(runs_dir, name, done_marker))
+        and (current is None or name != os.path.basename(current))
+    )
+    for name in finished[:-keep_runs] if keep_runs else finished:
+        shutil.rmtree(os.path.join(runs_dir, name), ignore_errors=True)
+
+@contextmanager
+def run_workspace(sports):
+    """
+    Runs the body from a new seeded workspace and publishes it if the body completes,
+    so overlapping runs never write to the same files.
+    """
+    run_dir = new_run()
+    seed(run_dir, sports)
+    previous = os.getcwd()
+    os.chdir(run_dir)
+    print(f"📂 Working in {os.path.relpath(run_dir, root_dir)}")
+    try:
+        yield run_dir
+    finally:
+        os.chdir(previous)
+        open(os.path.join(run_dir, done_marker), "w").close()
+    publish(run_dir)
+    prune_runs()